@@ -1,9 +1,19 @@
+import math
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
-from matplotlib.patches import Arc, Circle
+from matplotlib.patches import Arc
 import logging
 
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional: without it the physics kernel runs as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 # ======================
 # CONFIGURATION
 # ======================
@@ -41,6 +51,15 @@ RADIUS_STEP = 1.6 / max(NUM_RINGS, 1) # Adjust step to fit max radius (~2.0)
 GAP_SIZE = np.pi / 5  # Made gaps smaller (pi/5 -> pi/7)
 BASE_ROT_SPEED = 3.2  # Increased speed for higher difficulty
 
+# Derived constants (computed once instead of per ring, per substep)
+_DT_SUB = DT / SUBSTEPS
+_G_DT_SUB = GRAVITY * _DT_SUB
+_TWO_PI = 2 * np.pi
+_HALF_GAP = GAP_SIZE / 2
+_TWO_PI_MHG = _TWO_PI - _HALF_GAP
+_RAD2DEG = 180.0 / np.pi
+ARC_REDRAW_EPS = 2e-3  # rad; smaller gap movements don't touch the Arc artist
+
 def get_contrast_colors():
     """Pick two highly contrasting colors from the vivid palette."""
     c1 = np.random.choice(VIVID_COLORS)
@@ -50,6 +69,9 @@ def get_contrast_colors():
 
 BALL_COLOR, RING_COLOR = get_contrast_colors()
 
+# Palette names resolved to RGB once, so particles never hit the color parser
+COLOR_RGB = {c: plt.cm.colors.to_rgba(c)[:3] for c in VIVID_COLORS}
+
 # Timing state
 elapsed_time = 0.0
 SIM_LENGTH = 0.0
@@ -71,8 +93,20 @@ ax.axis("off")
 ball_pos = np.array([0.0, 0.0])
 ball_vel = np.array([1.2, 0.0])
 
-ball = Circle(ball_pos, BALL_RADIUS, color=BALL_COLOR)
-ax.add_patch(ball)
+def ball_marker_size():
+    """Scatter marker area (points^2) of a circle with BALL_RADIUS in data units."""
+    ax.apply_aspect()
+    x0 = ax.transData.transform((0, 0))[0]
+    x1 = ax.transData.transform((BALL_RADIUS, 0))[0]
+    diameter_pt = 2 * (x1 - x0) * 72 / fig.dpi
+    return diameter_pt ** 2
+
+# Single-point scatter (same trick as the particles): moving it is a set_offsets
+# call rather than regenerating a Circle patch path every frame
+ball = ax.scatter(
+    [ball_pos[0]], [ball_pos[1]],
+    s=ball_marker_size(), c=BALL_COLOR, linewidths=0, edgecolors="none"
+)
 
 # ======================
 # STOPWATCH
@@ -86,18 +120,27 @@ timer_text = ax.text(
     fontweight="bold",
     bbox=dict(facecolor='black', edgecolor='black', alpha=1.0)
 )
+# Elapsed centiseconds currently shown, so unchanged frames skip set_text
+timer_shown_cs = 0
 
 # ======================
 # RINGS
 # ======================
-rings = []
-shared_gap_angle = np.random.uniform(0, 2 * np.pi)
-
-for i in range(NUM_RINGS):
-    r = INNER_RADIUS + i * RADIUS_STEP
-    gap_angle = shared_gap_angle
-    speed = BASE_ROT_SPEED / (1 + i * 0.15)
-
+# Rings are stored as parallel arrays (struct-of-arrays) so every substep can
+# rotate and test all rings with a few vector ops instead of per-dict lookups.
+# Arc artists are kept in a plain list, index-aligned with the arrays.
+# radii is ascending by construction; the physics kernel relies on that.
+ring_index = np.arange(NUM_RINGS)
+radii = INNER_RADIUS + ring_index * RADIUS_STEP
+speeds = BASE_ROT_SPEED / (1 + ring_index * 0.15)
+gap_angles = np.full(NUM_RINGS, np.random.uniform(0, 2 * np.pi))
+alive = np.ones(NUM_RINGS, dtype=bool)
+rings_alive = NUM_RINGS  # kept in step with alive; rings only die one at a time
+arcs = []
+# Gap angle last pushed to each Arc (inf forces the first write)
+last_drawn_gap = np.full(NUM_RINGS, np.inf)
+
+for r in radii:
     arc = Arc(
         (0, 0),
         2 * r,
@@ -106,14 +149,7 @@ for i in range(NUM_RINGS):
         color=RING_COLOR,
     )
     ax.add_patch(arc)
-
-    rings.append({
-        "radius": r,
-        "gap_angle": gap_angle,
-        "speed": speed,
-        "arc": arc,
-        "alive": True,
-    })
+    arcs.append(arc)
 
 # ======================
 # GLOBAL ROTATION DIRECTION
@@ -123,112 +159,191 @@ ROT_DIR = 1   # flips after each ring pass
 # ======================
 # HELPERS
 # ======================
+# Scalar-only so they inline straight into the physics kernel (no ufunc dispatch)
+@njit(inline="always", cache=True)
 def wrap(a):
-    return np.mod(a, 2 * np.pi)
-
+    # Per-substep rotations are far below 2π, so one correction is always enough
+    if a >= _TWO_PI:
+        return a - _TWO_PI
+    if a < 0.0:
+        return a + _TWO_PI
+    return a
+
+@njit(inline="always", cache=True)
 def in_gap(theta, gap):
-    d = wrap(theta - gap)
-    return d < GAP_SIZE / 2 or d > 2 * np.pi - GAP_SIZE / 2
+    d = (theta - gap) % _TWO_PI
+    return (d < _HALF_GAP) | (d > _TWO_PI_MHG)
 
 # ======================
-# PARTICLES (Optimized using Scatter)
+# PHYSICS KERNEL
 # ======================
-# We use a single scatter collection for all particles to maximize FPS
-particle_scatter = ax.scatter([], [], s=5, alpha=0.9, edgecolors="none")
-particles_data = []
-
-def spawn_particles(x, y, color):
-    """Add new particle data to the system."""
-    num_particles = 25
-    for _ in range(num_particles):
-        angle = np.random.uniform(0, 2 * np.pi)
-        speed = np.random.uniform(1.0, 4.5)
-        p_vel = np.array([np.cos(angle) * speed, np.sin(angle) * speed])
-        
-        particles_data.append({
-            "pos": np.array([x, y]),
-            "vel": p_vel,
-            "life": 0.4 + np.random.uniform(0, 0.4),
-            "color": color
-        })
+# Explicit signature: compiled eagerly at import, so the first frame never stalls on JIT
+STEP_SIGNATURE = (
+    "Tuple((int64, float64, int64))("
+    "float64[::1], float64[::1], float64[::1], float64[::1], float64[::1], boolean[::1], "
+    "int64, float64, float64, float64)"
+)
 
-# ======================
-# UPDATE FUNCTION
-# ======================
-def update(frame):
-    global ball_pos, ball_vel, ROT_DIR, elapsed_time, SIM_LENGTH, simulation_running, cur_restitution, particles_data
+def make_step(num_rings):
+    """Build the substep kernel specialised for a fixed ring count."""
+    @njit(STEP_SIGNATURE, cache=True, fastmath=True, boundscheck=False)
+    def step(ball_pos, ball_vel, radii, gap_angles, speeds, alive, rot_dir, cur_restitution, max_speed, min_speed):
+        """
+        Advance ball and rings by one substep.
+        Mutates ball_pos, ball_vel, gap_angles and alive in place and returns
+        (rot_dir, cur_restitution, gap_hit_index); gap_hit_index is -1 if no ring was passed.
+        """
+        gap_hit_index = -1
+        px = ball_pos[0]
+        py = ball_pos[1]
 
-    if not simulation_running:
-        return [ball] + [r["arc"] for r in rings]
+        # Gravity
+        ball_vel[1] += _G_DT_SUB
+        ball_pos[0] = px + ball_vel[0] * _DT_SUB
+        ball_pos[1] = py + ball_vel[1] * _DT_SUB
 
-    for _ in range(SUBSTEPS):
-        prev_pos = ball_pos.copy()
-        
-        elapsed_time += DT / SUBSTEPS
+        r_prev = math.sqrt(px * px + py * py)
+        r_now = math.sqrt(ball_pos[0] * ball_pos[0] + ball_pos[1] * ball_pos[1])
+        theta_ball = math.atan2(ball_pos[1], ball_pos[0])
 
-        # Gravity
-        ball_vel[1] += GRAVITY * DT / SUBSTEPS
-        ball_pos += ball_vel * DT / SUBSTEPS
+        # Rotate using global direction
+        for i in range(num_rings):
+            gap_angles[i] = wrap(gap_angles[i] + rot_dir * speeds[i] * _DT_SUB)
 
-        r_prev = np.linalg.norm(prev_pos)
-        r_now = np.linalg.norm(ball_pos)
-        theta_ball = np.arctan2(ball_pos[1], ball_pos[0])
+        # Only rings with r_prev <= r <= r_now (or vice versa) can have been crossed;
+        # radii is sorted, so that band is a contiguous slice
+        i0 = np.searchsorted(radii, min(r_prev, r_now))
+        i1 = np.searchsorted(radii, max(r_prev, r_now), side="right")
 
-        for ring in rings:
-            if not ring["alive"]:
+        for i in range(i0, i1):
+            if not alive[i]:
                 continue
 
-            # Rotate using global direction
-            ring["gap_angle"] = wrap(
-                ring["gap_angle"] + ROT_DIR * ring["speed"] * DT / SUBSTEPS
-            )
+            r = radii[i]
 
-            r = ring["radius"]
-            crossed = (r_prev - r) * (r_now - r) <= 0
+            if in_gap(theta_ball, gap_angles[i]):
+                alive[i] = False
+                gap_hit_index = i
 
-            if crossed:
-                if in_gap(theta_ball, ring["gap_angle"]):
-                    ring["alive"] = False
-                    ring["arc"].set_visible(False)
-                    # ✨ SPAWN PARTICLES
-                    spawn_particles(ball_pos[0], ball_pos[1], RING_COLOR)
+                # � NERF: Decrease speed and bounce power
+                ball_vel *= 0.6
+                cur_restitution = max(MIN_RESTITUTION, cur_restitution * 0.6)
 
-                    # � NERF: Decrease speed and bounce power
-                    ball_vel *= 0.6
-                    cur_restitution = max(MIN_RESTITUTION, cur_restitution * 0.6)
+                # �🔄 REVERSE ALL RINGS
+                rot_dir = -rot_dir
 
-                    # �🔄 REVERSE ALL RINGS
-                    ROT_DIR *= -1
+            else:
+                nx = ball_pos[0] / (r_now + 1e-8)
+                ny = ball_pos[1] / (r_now + 1e-8)
+                tx, ty = -ny, nx
 
-                else:
-                    normal = ball_pos / (r_now + 1e-8)
-                    tangent = np.array([-normal[1], normal[0]])
+                vn = ball_vel[0] * nx + ball_vel[1] * ny
 
-                    vn = np.dot(ball_vel, normal)
+                # Bounce
+                k = (1 + cur_restitution) * vn
+                ball_vel[0] += TANGENTIAL_KICK * tx - k * nx
+                ball_vel[1] += TANGENTIAL_KICK * ty - k * ny
 
-                    # Bounce
-                    ball_vel -= (1 + cur_restitution) * vn * normal
-                    ball_vel += TANGENTIAL_KICK * tangent
-                    
-                    # 📈 REGAIN: Increase bounce power per impact
-                    cur_restitution = min(BASE_RESTITUTION, cur_restitution + 0.2)
+                # 📈 REGAIN: Increase bounce power per impact
+                cur_restitution = min(BASE_RESTITUTION, cur_restitution + 0.2)
 
-                    # Re-project
-                    direction = np.sign(r_prev - r)
-                    ball_pos = normal * (r + direction * BALL_RADIUS)
+                # Re-project
+                if r_prev > r:
+                    r_proj = r + BALL_RADIUS
+                elif r_prev < r:
+                    r_proj = r - BALL_RADIUS
+                else:
+                    r_proj = r
+                ball_pos[0] = nx * r_proj
+                ball_pos[1] = ny * r_proj
 
         # -------- Speed control --------
-        speed = np.linalg.norm(ball_vel)
+        speed = math.sqrt(ball_vel[0] * ball_vel[0] + ball_vel[1] * ball_vel[1])
         if speed > 1e-6:
             ball_vel *= (1 - DAMPING * speed)
 
-        if speed > MAX_SPEED:
-            ball_vel *= MAX_SPEED / speed
-        elif speed < MIN_SPEED and speed > 1e-6:
-            ball_vel *= MIN_SPEED / speed
+        if speed > max_speed:
+            ball_vel *= max_speed / speed
+        elif speed < min_speed and speed > 1e-6:
+            ball_vel *= min_speed / speed
+
+        return rot_dir, cur_restitution, gap_hit_index
+
+    return step
+
+_step = make_step(NUM_RINGS)
+
+# ======================
+# PARTICLES (Optimized using Scatter)
+# ======================
+# We use a single scatter collection for all particles to maximize FPS
+particle_scatter = ax.scatter([], [], s=5, alpha=0.9, edgecolors="none")
+
+# Particle state lives in preallocated parallel arrays; rows [0, n_particles) are alive
+MAX_PARTICLES = 1024
+p_pos = np.empty((MAX_PARTICLES, 2))
+p_vel = np.empty((MAX_PARTICLES, 2))
+p_life = np.empty(MAX_PARTICLES)
+p_rgb = np.empty((MAX_PARTICLES, 3))
+n_particles = 0
+
+def spawn_particles(x, y, rgb, num_particles=25):
+    """Add a burst of particles at (x, y), drawing all random values in one batch."""
+    global n_particles
+    num_particles = min(num_particles, MAX_PARTICLES - n_particles)
+    if num_particles <= 0:
+        return
+
+    angles = np.random.uniform(0, 2 * np.pi, num_particles)
+    speeds = np.random.uniform(1.0, 4.5, num_particles)
+
+    new = slice(n_particles, n_particles + num_particles)
+    p_pos[new] = (x, y)
+    p_vel[new, 0] = np.cos(angles) * speeds
+    p_vel[new, 1] = np.sin(angles) * speeds
+    p_life[new] = 0.4 + np.random.uniform(0, 0.4, num_particles)
+    p_rgb[new] = rgb
+    n_particles += num_particles
+
+# ======================
+# BLIT ARTISTS
+# ======================
+def refresh_frame_artists():
+    """Rebuild the artists returned for blitting; dead rings are left out."""
+    global frame_artists
+    frame_artists = (ball, timer_text, particle_scatter) + tuple(
+        arc for arc, is_alive in zip(arcs, alive) if is_alive
+    )
+
+frame_artists = ()
+refresh_frame_artists()
+
+# ======================
+# UPDATE FUNCTION
+# ======================
+def update(frame):
+    global ROT_DIR, elapsed_time, SIM_LENGTH, simulation_running, cur_restitution, n_particles, timer_shown_cs, rings_alive
+
+    if not simulation_running:
+        return frame_artists
+
+    for _ in range(SUBSTEPS):
+        elapsed_time += _DT_SUB
+
+        ROT_DIR, cur_restitution, gap_hit_index = _step(
+            ball_pos, ball_vel, radii, gap_angles, speeds, alive,
+            ROT_DIR, cur_restitution, MAX_SPEED, MIN_SPEED
+        )
+
+        if gap_hit_index >= 0:
+            rings_alive -= 1
+            arcs[gap_hit_index].set_visible(False)
+            refresh_frame_artists()
+            # ✨ SPAWN PARTICLES
+            spawn_particles(ball_pos[0], ball_pos[1], COLOR_RGB[RING_COLOR])
 
     # Check if all rings are gone
-    if all(not r["alive"] for r in rings):
+    if rings_alive == 0:
         if simulation_running:
             SIM_LENGTH = elapsed_time
             print(f"✅ Simulation Complete!")
@@ -237,70 +352,76 @@ def update(frame):
             if SIM_LENGTH < 20.0:
                 logger.info("⏩ Too fast (<20s). Auto-Restarting...")
                 reset_simulation()
-                return [ball, timer_text, particle_scatter] + [r["arc"] for r in rings]
+                return frame_artists
 
             simulation_running = False
             ani.event_source.stop()
 
     # Update visuals only for ALIVE rings
-    living_rings = [r for r in rings if r["alive"]]
-    for ring in living_rings:
-        ring["arc"].theta1 = np.degrees(ring["gap_angle"] + GAP_SIZE / 2)
-        ring["arc"].theta2 = np.degrees(ring["gap_angle"] - GAP_SIZE / 2 + 2 * np.pi)
-
-    # Update stopwatch
-    mins = int(elapsed_time // 60)
-    secs = int(elapsed_time % 60)
-    cent = int((elapsed_time * 100) % 100)
-    timer_text.set_text(f"{mins:02d}:{secs:02d}:{cent:02d}")
+    # Skip rings whose gap hasn't moved perceptibly since the last draw
+    changed = alive & (np.abs(gap_angles - last_drawn_gap) > ARC_REDRAW_EPS)
+    for i in np.flatnonzero(changed):
+        gap = gap_angles[i]
+        arcs[i].theta1 = (gap + _HALF_GAP) * _RAD2DEG
+        arcs[i].theta2 = (gap + _TWO_PI_MHG) * _RAD2DEG
+        last_drawn_gap[i] = gap
+
+    # Update stopwatch (text layout only when the shown value changes)
+    t_cs = int(elapsed_time * 100)
+    if t_cs != timer_shown_cs:
+        timer_shown_cs = t_cs
+        timer_text.set_text("%02d:%02d:%02d" % (t_cs // 6000, (t_cs // 100) % 60, t_cs % 100))
 
     # ⏱️ AUTO-RESTART: If exceeds 30 seconds
     if elapsed_time > 30.0:
         logger.info("⏰ Time Limit Reached (30s). Auto-Restarting...")
         reset_simulation()
-        return [ball, timer_text, particle_scatter] + [r["arc"] for r in rings]
-
-    # 🎇 Update Particles (Highly Optimized)
-    alive_p = []
-    points = []
-    colors = []
-    
-    for p in particles_data:
-        p["life"] -= DT
-        if p["life"] > 0:
-            p["vel"][1] += GRAVITY * DT
-            p["pos"] += p["vel"] * DT
-            alive_p.append(p)
-            points.append(p["pos"])
-            # Alpha logic: mapping color name to RGBA
-            rgb = plt.cm.colors.to_rgba(p["color"])
-            colors.append((rgb[0], rgb[1], rgb[2], p["life"]))
-    
-    particles_data[:] = alive_p
-    
-    if points:
-        particle_scatter.set_offsets(points)
+        return frame_artists
+
+    # 🎇 Update Particles (vectorized over the live rows)
+    n = n_particles
+    if n:
+        p_life[:n] -= DT
+        p_vel[:n, 1] += GRAVITY * DT
+        p_pos[:n] += p_vel[:n] * DT
+
+        # Compact survivors to the front of the buffers
+        keep = p_life[:n] > 0
+        n_particles = int(np.count_nonzero(keep))
+        if n_particles < n:
+            p_pos[:n_particles] = p_pos[:n][keep]
+            p_vel[:n_particles] = p_vel[:n][keep]
+            p_life[:n_particles] = p_life[:n][keep]
+            p_rgb[:n_particles] = p_rgb[:n][keep]
+
+    if n_particles:
+        # Alpha logic: fade out with remaining life
+        colors = np.empty((n_particles, 4))
+        colors[:, :3] = p_rgb[:n_particles]
+        colors[:, 3] = p_life[:n_particles]
+        particle_scatter.set_offsets(p_pos[:n_particles])
         particle_scatter.set_color(colors)
         particle_scatter.set_visible(True)
     else:
         particle_scatter.set_visible(False)
 
-    ball.center = ball_pos
-    return [ball, timer_text, particle_scatter] + [r["arc"] for r in rings]
+    ball.set_offsets(ball_pos)
+    return frame_artists
 
 # ======================
 # INTERACTIVITY & RESET
 # ======================
 def reset_simulation():
-    global ball_pos, ball_vel, cur_restitution, elapsed_time, simulation_running, ROT_DIR, rings, particles_data, RING_COLOR, MAX_SPEED, MIN_SPEED
+    global cur_restitution, elapsed_time, simulation_running, ROT_DIR, n_particles, RING_COLOR, MAX_SPEED, MIN_SPEED, timer_shown_cs, rings_alive
     
     # 🧹 Clear Particles
-    particles_data.clear()
+    n_particles = 0
     particle_scatter.set_offsets(np.empty((0, 2)))
     
     # 🏎️ SCALE PHYSICS
-    ball_pos = np.array([0.0, 0.0])
-    ball_vel = np.array([1.2, 0.0]) 
+    # Written in place: the physics kernel keeps operating on the same buffers
+    ball_pos[:] = (0.0, 0.0)
+    ball_vel[:] = (1.2, 0.0)
     MAX_SPEED = MAX_SPEED_BASE
     MIN_SPEED = MIN_SPEED_BASE
     cur_restitution = 1.8           
@@ -312,23 +433,27 @@ def reset_simulation():
     shared_gap_angle = np.random.uniform(0, 2 * np.pi)
     
     # Reset rings
-    for i, ring in enumerate(rings):
-        ring["alive"] = True
-        ring["arc"].set_visible(True)
-        # Apply current speed multiplier to rings
-        ring["speed"] = (BASE_ROT_SPEED) / (1 + i * 0.15)
-        # All rings start aligned at the shared center
-        ring["gap_angle"] = shared_gap_angle
+    alive[:] = True
+    rings_alive = NUM_RINGS
+    # Apply current speed multiplier to rings
+    speeds[:] = BASE_ROT_SPEED / (1 + ring_index * 0.15)
+    # All rings start aligned at the shared center
+    gap_angles[:] = shared_gap_angle
+    last_drawn_gap[:] = np.inf
+    for arc in arcs:
+        arc.set_visible(True)
+    refresh_frame_artists()
     
     # Reset UI
     timer_text.set_text("00:00:00")
+    timer_shown_cs = 0
     
     # Reset Colors
     new_ball_color, new_ring_color = get_contrast_colors()
     RING_COLOR = new_ring_color # Update global for particles
-    ball.set_color(new_ball_color)
-    for ring in rings:
-        ring["arc"].set_color(new_ring_color)
+    ball.set_facecolor(new_ball_color)
+    for arc in arcs:
+        arc.set_color(new_ring_color)
     
     # 🛠️ macOS Stability: Only start if not already running
     if not simulation_running:
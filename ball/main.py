@@ -2,7 +2,6 @@ import pygame
 import math
 import random
 import numpy as np
-from collections import deque
 pygame.init()
 
 WHITE = (255, 255, 255)
@@ -35,58 +34,110 @@ ball_color = RED
 trail_length = 10
 trail_fade = 20
 GRAVITY = np.array([0,0.1])
-def distance(p1, p2):
-    return math.sqrt((p1[0] - p2[0]) ** 2 + (p1[1] - p2[1]) ** 2)
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional: without it the physics kernel runs as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Ball physics state as struct-of-arrays; rows [0, len(balls)) are in use
+MAX_BALLS = 1024
+ball_pos = np.zeros((MAX_BALLS, 2))
+ball_vel = np.zeros((MAX_BALLS, 2))
+ball_radius = np.zeros(MAX_BALLS)
+
+@njit(cache=True)
+def step_all(pos, vel, radius, n, gravity, cx, cy, boundary_r):
+    """Integrate n balls, bounce them off the boundary circle and resolve ball-ball collisions."""
+    for i in range(n):
+        pos[i, 0] += vel[i, 0]
+        pos[i, 1] += vel[i, 1]
+        vel[i, 0] += gravity[0]
+        vel[i, 1] += gravity[1]
+
+        # with edge
+        dx = pos[i, 0] - cx
+        dy = pos[i, 1] - cy
+        dist_sq = dx * dx + dy * dy
+        limit = boundary_r - radius[i]
+        # Compare squared distances; sqrt only once a bounce is actually resolved
+        if dist_sq > limit * limit:
+            dist = math.sqrt(dist_sq)
+            nx = dx / dist
+            ny = dy / dist
+            dot_product = vel[i, 0] * nx + vel[i, 1] * ny
+            vel[i, 0] -= 2 * dot_product * nx
+            vel[i, 1] -= 2 * dot_product * ny
+
+            dist_to_correct = dist + radius[i] - boundary_r
+            pos[i, 0] -= dist_to_correct * nx
+            pos[i, 1] -= dist_to_correct * ny
+
+    if n < 2:
+        return
+
+    # Sweep and prune along x: once the x gap exceeds r_i + max radius no later ball can touch i
+    order = np.argsort(pos[:n, 0])
+    max_r = radius[:n].max()
+    for a in range(n):
+        i = order[a]
+        for b in range(a + 1, n):
+            j = order[b]
+            if pos[j, 0] - pos[i, 0] > radius[i] + max_r:
+                break
+            dx = pos[i, 0] - pos[j, 0]
+            dy = pos[i, 1] - pos[j, 1]
+            dist_sq = dx * dx + dy * dy
+            reach = radius[i] + radius[j]
+            if dist_sq < reach * reach:
+                dist = math.sqrt(dist_sq)
+                nx = dx / dist
+                ny = dy / dist
+                dot_product = (vel[i, 0] - vel[j, 0]) * nx + (vel[i, 1] - vel[j, 1]) * ny
+                vel[i, 0] -= dot_product * nx
+                vel[i, 1] -= dot_product * ny
+                vel[j, 0] += dot_product * nx
+                vel[j, 1] += dot_product * ny
+
+                proportion = radius[i] / (radius[i] + radius[j])
+                pos[i, 0] += nx * proportion
+                pos[i, 1] += ny * proportion
+                pos[j, 0] -= nx * (1 - proportion)
+                pos[j, 1] -= ny * (1 - proportion)
 
 class Ball:
-    def __init__(self, pos, vel, radius, color=RED):
-        self.pos = pos
-        self.vel = vel
+    def __init__(self, index, pos, vel, radius, color=RED):
+        # pos/vel are views into the shared arrays the physics kernel works on
+        ball_pos[index] = pos
+        ball_vel[index] = vel
+        ball_radius[index] = radius
+        self.pos = ball_pos[index]
+        self.vel = ball_vel[index]
         self.radius = radius
         self.color = color
-        self.trail = deque()
-    def next_frame(self):
-            self.pos += self.vel
-            self.vel += GRAVITY
-            self.trail.appendleft(self.pos.copy())
-            if len(self.trail) > trail_length:
-                self.trail.pop()
+        # Trail is a fixed ring buffer; head is the slot the next position goes into
+        self.trail = np.empty((trail_length, 2), float)
+        self.head = 0
+        self.trail_count = 0
+        # Faded color per trail age (0 = newest), computed once instead of per frame
+        faded = np.clip(np.array(color)[None, :] - trail_fade * np.arange(trail_length)[:, None], 0, 255)
+        self.trail_colors = [tuple(c) for c in faded.astype(int).tolist()]
+    def record_trail(self):
+            self.trail[self.head] = self.pos
+            self.head = (self.head + 1) % trail_length
+            self.trail_count = min(self.trail_count + 1, trail_length)
     def draw_trail(self):
-        for i, pos in enumerate(self.trail):
-            trail_color_faded = tuple((max(comp - i * trail_fade, 0) for comp in self.color))
-            pygame.draw.circle(screen, trail_color_faded, pos.astype(int), self.radius - i, width=0)
+        points = self.trail.astype(int)
+        for i in range(self.trail_count):
+            pos = points[(self.head - 1 - i) % trail_length]
+            pygame.draw.circle(screen, self.trail_colors[i], pos, self.radius - i, width=0)
 class Circle:
     def __init__(self, center, radius=250):
         self.radius = radius
         self.center = center
-    def check_collision(self, ball):
-        # with edge
-        dist = distance(ball.pos, self.center)
-        if dist > (self.radius - ball.radius):
-
-            # self.radius -= 3
-            normal = (ball.pos - self.center) / dist
-            dot_product = np.dot(ball.vel, normal)
-            ball.vel -= 2 * dot_product * normal
-
-            dist_to_correct = dist + ball.radius - self.radius
-            ball.pos -= dist_to_correct * normal
-
-
-def collision_handler(ball):
-    for other_ball in balls:
-        if ball is not other_ball:
-            dist = distance(ball.pos, other_ball.pos)
-            if dist < (ball.radius + other_ball.radius):
-                dv = ball.vel - other_ball.vel
-                normal = (ball.pos - other_ball.pos) / dist
-                dot_product = np.dot(dv, normal)
-                ball.vel -= dot_product * normal
-                other_ball.vel += dot_product * normal
-
-                proportion = ball.radius / (ball.radius + other_ball.radius)
-                ball.pos += normal * proportion
-                other_ball.pos -= normal * (1 - proportion)
 
 running = True
 clock = pygame.time.Clock()
@@ -97,10 +148,9 @@ color = 1
 while running:
     screen.fill(BLACK)
     pygame.draw.circle(screen, WHITE, circle.center, circle.radius, 1)
+    step_all(ball_pos, ball_vel, ball_radius, len(balls), GRAVITY, circle.center[0], circle.center[1], circle.radius)
     for ball in balls:
-        ball.next_frame()
-        circle.check_collision(ball)
-        collision_handler(ball)
+        ball.record_trail()
         ball.draw_trail()
     for ball in balls:
         pygame.draw.circle(screen, ball.color, ball.pos.astype(int), ball.radius, width=0)
@@ -108,8 +158,9 @@ while running:
         if event.type == pygame.QUIT:
             running = False
         elif event.type == pygame.MOUSEBUTTONDOWN:
-            balls.append(Ball(pygame.mouse.get_pos(), np.array([0,0], float), random.randint(10, 25), ball_colors[color % len(ball_colors)]))
-            color += 1
+            if len(balls) < MAX_BALLS:
+                balls.append(Ball(len(balls), pygame.mouse.get_pos(), np.array([0,0], float), random.randint(10, 25), ball_colors[color % len(ball_colors)]))
+                color += 1
         keys = pygame.key.get_pressed()
         if keys[pygame.K_c]:
                 balls.clear()
@@ -4,6 +4,7 @@ import subprocess
 import logging
 import re
 import time
+import threading
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 
@@ -24,6 +25,54 @@ CLIPS_DIR = "/clips" if IS_DOCKER else os.path.join(BASE_DIR, "clips")
 
 os.makedirs(CLIPS_DIR, exist_ok=True)
 
+# Hardware H.264 encoders in order of preference
+HW_ENCODERS = ["h264_nvenc", "h264_videotoolbox", "h264_qsv"]
+
+def video_codec_args(encoder):
+    """FFmpeg video encoder arguments for a hardware encoder, or libx264 when None."""
+    if encoder:
+        return ["-c:v", encoder, "-b:v", "5M"]
+    return [
+        "-c:v", "libx264",
+        "-preset", "veryfast",           # Efficiency: faster encoding
+        "-crf", "22",                    # Good balance of size/quality
+    ]
+
+def encoder_works(encoder):
+    """Encode one synthetic frame; a listed encoder can still lack a usable device or driver."""
+    try:
+        subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error",
+             "-f", "lavfi", "-i", "color=s=256x256", "-frames:v", "1",
+             *video_codec_args(encoder), "-f", "null", "-"],
+            check=True, capture_output=True, timeout=30
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return True
+
+def detect_hw_encoder():
+    """Return the first hardware H.264 encoder this ffmpeg build can actually run, or None."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            check=True, capture_output=True, text=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    available = set(re.findall(r"^\s*V\S*\s+(\S+)", result.stdout, re.MULTILINE))
+    for encoder in HW_ENCODERS:
+        if encoder in available and encoder_works(encoder):
+            return encoder
+    return None
+
+HW_ENCODER = detect_hw_encoder()
+# Guards clearing HW_ENCODER when it fails mid-run; clips encode on several threads
+_hw_encoder_lock = threading.Lock()
+
+# libx264 is already multi-threaded; a few concurrent encodes fill the gaps without oversubscribing
+MAX_CLIP_WORKERS = min(4, os.cpu_count() or 1)
+
 def load_all_highlights():
     """Load all highlights JSON files from the highlights directory."""
     return list(Path(HIGHLIGHTS_DIR).glob("*_highlights.json"))
@@ -47,14 +96,16 @@ def get_video_path(video_stem):
 def create_clip(video_path, start, end, output_path):
     """
     Extract a clip and format it for 9:16 vertical video.
-    Efficiency: Uses fast-seek (-ss before -i) and hardware-friendly settings.
+    Efficiency: Uses fast-seek (-ss before -i) and a hardware encoder when available.
     Accuracy: Re-encoding ensures frame-accurate cuts.
     """
+    global HW_ENCODER
     if output_path.exists():
         logger.info(f"⏭️  Skipping existing clip: {output_path.name}")
         return True
 
     duration = end - start
+
     # Layout: Original horizontal video in the top third of a 9:16 frame
     # 1. Scale video to 1080 width (standard TikTok/Shorts width)
     # 2. Pad to 1080x1920, placing the video at the very top (y=0)
@@ -63,26 +114,41 @@ def create_clip(video_path, start, end, output_path):
         "pad=1080:1920:0:0:black" # Container 1080x1920, video at top, remainder black
     )
 
-    cmd = [
-        "ffmpeg", "-hide_banner", "-loglevel", "error",
-        "-ss", str(max(0, start - 0.5)), # Accurate seek (slight buffer)
-        "-i", str(video_path),
-        "-ss", "0.5",                    # Precise seek within the cut
-        "-t", str(duration),
-        "-vf", vf_filter,
-        "-c:v", "libx264", 
-        "-preset", "veryfast",           # Efficiency: faster encoding
-        "-crf", "22",                    # Good balance of size/quality
-        "-c:a", "aac", "-b:a", "192k",
-        "-y", str(output_path)
-    ]
-
+    def build_cmd(encoder):
+        return [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-ss", str(max(0, start - 0.5)), # Accurate seek (slight buffer)
+            "-i", str(video_path),
+            "-ss", "0.5",                    # Precise seek within the cut
+            "-t", str(duration),
+            "-vf", vf_filter,
+            *video_codec_args(encoder),
+            "-c:a", "aac", "-b:a", "192k",
+            "-y", str(output_path)
+        ]
+
+    encoder = HW_ENCODER
     try:
-        subprocess.run(cmd, check=True)
+        subprocess.run(build_cmd(encoder), check=True)
         return True
     except subprocess.CalledProcessError as e:
+        if not encoder:
+            logger.error(f"❌ FFmpeg failed for {output_path.name}: {e}")
+            return False
+        logger.warning(f"⚠️ {encoder} failed for {output_path.name}, retrying with libx264")
+
+    try:
+        subprocess.run(build_cmd(None), check=True)
+    except subprocess.CalledProcessError as e:
+        # A bad source or seek fails on any encoder, so the hardware one stays enabled
         logger.error(f"❌ FFmpeg failed for {output_path.name}: {e}")
         return False
+    # The CPU encode worked, so the device went away after the startup probe; stop trying it for every clip
+    with _hw_encoder_lock:
+        if HW_ENCODER == encoder:
+            logger.warning(f"⚠️ Using libx264 instead of {encoder} from now on")
+            HW_ENCODER = None
+    return True
 
 def process_highlight_file(file_path):
     """Process a single highlights JSON file."""
@@ -103,6 +169,7 @@ def process_highlight_file(file_path):
 
     logger.info(f"🎞️  Processing {len(highlights)} clips for: {video_path.name}")
     
+    jobs = []
     for i, h in enumerate(highlights):
         start = h.get("start")
         end = h.get("end")
@@ -113,9 +180,14 @@ def process_highlight_file(file_path):
 
         output_name = f"clip_{i+1:02d}.mp4"
         output_path = Path(CLIPS_DIR) / output_name
-
-        if create_clip(video_path, start, end, output_path):
-            logger.info(f"✅ Created: {output_name}")
+        jobs.append((video_path, start, end, output_path))
+
+    # Each clip is an independent ffmpeg process, so encode several at once
+    with ThreadPoolExecutor(max_workers=MAX_CLIP_WORKERS) as executor:
+        results = executor.map(lambda job: create_clip(*job), jobs)
+        for job, created in zip(jobs, results):
+            if created:
+                logger.info(f"✅ Created: {job[3].name}")
 
 def main():
     logger.info("============================================================")
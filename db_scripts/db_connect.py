@@ -1,7 +1,11 @@
 import os
 import logging
+import functools
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 
 load_dotenv()
 
@@ -11,12 +15,22 @@ DB_NAME = os.getenv('POSTGRES_DB')
 DB_HOST = os.getenv('POSTGRES_HOST')
 DB_PORT = os.getenv('POSTGRES_PORT')
 
-def db_conn():
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _hosts_to_try():
     # If we are running locally (outside Docker), 'db' won't resolve.
     # We try the configured host first, then fallback to localhost.
-    hosts_to_try = [DB_HOST]
+    hosts = [DB_HOST]
     if DB_HOST != 'localhost' and DB_HOST != '127.0.0.1':
-        hosts_to_try.append('localhost')
+        hosts.append('localhost')
+    return hosts
+
+def db_conn():
+    hosts_to_try = _hosts_to_try()
 
     for host in hosts_to_try:
         try:
@@ -30,6 +44,71 @@ def db_conn():
             return conn
         except Exception:
             continue
-    
+
     print(f"Unable to connect to PostgreSQL on any of {hosts_to_try}")
-    return None
\ No newline at end of file
+    return None
+
+def _get_pool():
+    """Create the shared connection pool on first use (same host fallback as db_conn)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+
+        hosts_to_try = _hosts_to_try()
+        for host in hosts_to_try:
+            try:
+                _pool = ThreadedConnectionPool(POOL_MIN_CONN, POOL_MAX_CONN,
+                                               dbname=DB_NAME,
+                                               user=DB_USER,
+                                               password=DB_PASSWORD,
+                                               host=host,
+                                               port=DB_PORT,
+                                               connect_timeout=3
+                                               )
+                return _pool
+            except Exception:
+                continue
+
+        print(f"Unable to connect to PostgreSQL on any of {hosts_to_try}")
+        raise psycopg2.OperationalError(f"Unable to connect to PostgreSQL on any of {hosts_to_try}")
+
+def _discard_pool(pool):
+    """Forget a pool whose server went away; its idle connections are dead too, so the next get_conn() starts fresh."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+@contextmanager
+def get_conn():
+    """
+    Borrow a connection from the shared pool and hand it back afterwards.
+    Uncommitted work is rolled back when the block raises.
+    """
+    pool = _get_pool()
+    conn = pool.getconn()
+    if conn.closed:
+        pool.putconn(conn, close=True)
+        conn = pool.getconn()
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        elif pool is _pool:
+            # psycopg2 only marks a connection closed once a query hits the dropped socket (e.g. DB restart)
+            _discard_pool(pool)
+        raise
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
+
+def retry_on_disconnect(func):
+    """Run a DB helper once more if its connection turned out to be dead; get_conn() has reset the pool by then."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return func(*args, **kwargs)
+    return wrapper
@@ -1,31 +1,31 @@
-from db_scripts.db_connect import db_conn
+from db_scripts.db_connect import get_conn, retry_on_disconnect
 
+@retry_on_disconnect
 def fetch_channels():
     """Return all channels from DB."""
-    conn = db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id, name, link FROM Channels ORDER BY id;")
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT id, name, link FROM Channels ORDER BY id;")
+        return cur.fetchall()
 
+@retry_on_disconnect
 def video_exists(link):
     """Check if video already exists in DB."""
-    conn = db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM Videos WHERE link = %s LIMIT 1;", (link,))
-    exists = cur.fetchone() is not None
-    cur.close()
-    conn.close()
-    return exists
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM Videos WHERE link = %s LIMIT 1;", (link,))
+        return cur.fetchone() is not None
 
+@retry_on_disconnect
+def videos_exist(links):
+    """Return the subset of links that are already in DB, in one query."""
+    if not links:
+        return set()
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT link FROM Videos WHERE link = ANY(%s);", (list(links),))
+        return {row[0] for row in cur.fetchall()}
+
+@retry_on_disconnect
 def count_undownloaded_videos():
     """Return number of videos not yet downloaded."""
-    conn = db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM Videos WHERE is_downloaded = FALSE;")
-    count = cur.fetchone()[0]
-    cur.close()
-    conn.close()
-    return count
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM Videos WHERE is_downloaded = FALSE;")
+        return cur.fetchone()[0]
@@ -1,12 +1,12 @@
-from db_scripts.db_connect import db_conn
+from psycopg2.extras import execute_values
+from db_scripts.db_connect import get_conn, retry_on_disconnect
 import logging
 
 logger = logging.getLogger("DB_insert")
 
+@retry_on_disconnect
 def db_insert_video(link, channel_id):
-    conn = db_conn()
-    cur = conn.cursor()
-    try:
+    with get_conn() as conn, conn.cursor() as cur:
         cur.execute(
             """
             INSERT INTO Videos (link, is_downloaded, is_used, channel_id)
@@ -25,23 +25,39 @@ def db_insert_video(link, channel_id):
         else:
             logger.info("Video already existed (race): %s", link)
             return None
-    finally:
-        cur.close()
-        conn.close()
 
+@retry_on_disconnect
+def db_insert_videos(rows):
+    """Insert many (link, channel_id) rows in one statement; return ids of the new ones."""
+    if not rows:
+        return []
+    with get_conn() as conn, conn.cursor() as cur:
+        inserted = execute_values(
+            cur,
+            """
+            INSERT INTO Videos (link, is_downloaded, is_used, channel_id)
+            VALUES %s
+            ON CONFLICT (link) DO NOTHING
+            RETURNING id;
+            """,
+            rows,
+            template="(%s, FALSE, FALSE, %s)",
+            fetch=True,
+        )
+        conn.commit()
+    ids = [row[0] for row in inserted]
+    logger.info("Inserted %s of %s videos", len(ids), len(rows))
+    return ids
+
+@retry_on_disconnect
 def db_insert_channel(channels: list[dict]):
-    conn = db_conn()
-    cur = conn.cursor()
     query = """
         INSERT INTO channels (name, link)
-        VALUES (%s, %s)
+        VALUES %s
         ON CONFLICT (name) DO NOTHING;
         """
-    for ch in channels:
-        cur.execute(query, (ch["title"], ch["url"]))
-
-    conn.commit()
-    cur.close()
-    conn.close()
+    with get_conn() as conn, conn.cursor() as cur:
+        execute_values(cur, query, [(ch["title"], ch["url"]) for ch in channels])
+        conn.commit()
 
     print(f"Inserted {len(channels)} channels into the database.")
@@ -1,9 +1,11 @@
 # downloader/downloader.py
 import os
+import atexit
+import shutil
 import logging
 import yt_dlp
 
-from db_scripts.db_connect import db_conn
+from db_scripts.db_connect import get_conn, retry_on_disconnect
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger("Downloader")
@@ -12,31 +14,14 @@ logger = logging.getLogger("Downloader")
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DOWNLOAD_DIR = "/downloads" if os.path.exists("/.dockerenv") else os.path.join(BASE_DIR, "downloads")
 
-def fetch_next_video():
-    """Fetch one video that is not downloaded yet."""
-    conn = db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id, link FROM Videos WHERE is_downloaded = FALSE LIMIT 1;")
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
-    return row  # (id, link) or None
+# YouTube throttles each connection, so pull several fragments/streams in parallel
+CONCURRENT_FRAGMENTS = 8
+HTTP_CHUNK_SIZE = 10 << 20  # 10 MiB
+ARIA2C_PATH = shutil.which("aria2c")
 
-def mark_downloaded(video_id):
-    """Mark video as downloaded."""
-    conn = db_conn()
-    cur = conn.cursor()
-    cur.execute("UPDATE Videos SET is_downloaded = TRUE WHERE id = %s;", (video_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
-
-def download_highest_quality(video_id, video_url):
-    """Download best video + audio and merge into one MP4."""
-    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-
-    ydl_opts = {
-    "format": "bv*+ba/b",  # safer fallback
+YDL_OPTS = {
+    # Prefer MP4/M4A streams: they merge by remux and need no conversion pass
+    "format": "bv*[ext=mp4]+ba[ext=m4a]/b[ext=mp4]/bv*+ba/b",  # safer fallback
     "outtmpl": f"{DOWNLOAD_DIR}/%(title)s [%(id)s].%(ext)s",
     "merge_output_format": "mp4",
     "noplaylist": True,
@@ -54,16 +39,62 @@ def download_highest_quality(video_id, video_url):
             "player_client": ["android"]  
         }
     },
+    # Only does work for the last-resort non-MP4 single file; MP4s are left alone
     "postprocessors": [
         {"key": "FFmpegVideoConvertor", "preferedformat": "mp4"}
     ],
-    "progress_hooks": [lambda d: progress_hook(d, video_id)],
+    "concurrent_fragment_downloads": CONCURRENT_FRAGMENTS,
+    "http_chunk_size": HTTP_CHUNK_SIZE,
 }
 
+if ARIA2C_PATH:
+    YDL_OPTS["external_downloader"] = {"default": "aria2c"}
+    YDL_OPTS["external_downloader_args"] = {"aria2c": ["-x", "16", "-s", "16"]}
+
+@retry_on_disconnect
+def fetch_next_video():
+    """Fetch one video that is not downloaded yet."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT id, link FROM Videos
+            WHERE is_downloaded = FALSE
+            LIMIT 1;
+        """)
+        row = cur.fetchone()
+        conn.commit()
+    return row  # (id, link) or None
+
+@retry_on_disconnect
+def mark_downloaded(video_id):
+    """Mark video as downloaded. Returns False if the video no longer exists."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("UPDATE Videos SET is_downloaded = TRUE WHERE id = %s RETURNING id;", (video_id,))
+        updated = cur.fetchone() is not None
+        conn.commit()
+    return updated
+
+# One YoutubeDL for the whole process: extractors and HTTP sessions are reused across videos
+_ydl = None
+_current_video_id = None
+
+def get_ydl():
+    """Build the shared YoutubeDL on first use."""
+    global _ydl
+    if _ydl is None:
+        _ydl = yt_dlp.YoutubeDL(YDL_OPTS)
+        # Options are read once at construction, so the hook looks up the current video itself
+        _ydl.add_progress_hook(lambda d: progress_hook(d, _current_video_id))
+        atexit.register(_ydl.close)
+    return _ydl
+
+def download_highest_quality(video_id, video_url):
+    """Download best video + audio and merge into one MP4."""
+    global _current_video_id
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    _current_video_id = video_id
 
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([video_url])
+        get_ydl().download([video_url])
     except Exception as e:
         logger.error(f"Download failed for {video_url}: {e}")
 
@@ -71,7 +102,8 @@ def progress_hook(d, video_id):
     """Hook to update progress or mark as downloaded."""
     if d["status"] == "finished":
         logger.info(f"✅ Finished downloading: {d['filename']}")
-        mark_downloaded(video_id)
+        if not mark_downloaded(video_id):
+            logger.warning(f"⚠️ Video {video_id} was removed from the DB during download")
 
 def main():
     video = fetch_next_video()
@@ -1,11 +1,22 @@
 import os
+import sys
 import json
+import math
 import random
 import subprocess
 import logging
 import re
+import threading
+from bisect import bisect_left, bisect_right
 from pathlib import Path
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional: it only speeds up loading large transcripts
+    orjson = None
 
 # Configure logging
 logging.basicConfig(
@@ -36,44 +47,151 @@ EDITED_DIR = "/edited_clips" if IS_DOCKER else os.path.join(BASE_DIR, "edited_cl
 
 os.makedirs(EDITED_DIR, exist_ok=True)
 
+# Subtitle files only live for one encode; keep them in RAM when the OS offers a tmpfs
+SHM_DIR = "/dev/shm"
+ASS_DIR = SHM_DIR if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK) else EDITED_DIR
+
+CLIP_INDEX_RE = re.compile(r"clip_(\d+)")
+NUMBER_RE = re.compile(r"(\d+)")
+
+# Encoder -> (args placed before every -i, video codec args), in order of preference.
+# Decoded frames stay in system memory: the scale/overlay/ass filters run on the CPU.
+ENCODER_SETTINGS = {
+    "h264_nvenc": (
+        ["-hwaccel", "cuda"],
+        ["-c:v", "h264_nvenc", "-preset", "p4", "-tune", "hq", "-rc", "vbr", "-cq", "23", "-b:v", "0"],
+    ),
+    "h264_qsv": (
+        ["-hwaccel", "qsv"],
+        ["-c:v", "h264_qsv", "-global_quality", "23", "-preset", "veryfast"],
+    ),
+    "libx264": (
+        [],
+        # Fixed 48-frame GOP: the clips are short, so scene-cut detection costs more than it buys
+        ["-c:v", "libx264", "-preset", "veryfast", "-crf", "22",
+         "-g", "48", "-x264-params", "scenecut=0:keyint=48:min-keyint=48"],
+    ),
+}
+
+def _encoder_works(encoder):
+    """Encode one synthetic frame; a listed encoder can still lack a usable device or driver."""
+    try:
+        subprocess.run(
+            [FFMPEG_PATH, "-hide_banner", "-loglevel", "error",
+             "-f", "lavfi", "-i", "color=s=256x256", "-frames:v", "1",
+             *ENCODER_SETTINGS[encoder][1], "-f", "null", "-"],
+            capture_output=True, check=True, timeout=30
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return True
+
+def _pick_encoder():
+    """Return the first H.264 encoder from ENCODER_SETTINGS that this FFmpeg build can actually run."""
+    try:
+        result = subprocess.run(
+            [FFMPEG_PATH, "-hide_banner", "-encoders"],
+            capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "libx264"
+    listed = set(re.findall(r"^\s*V\S*\s+(\S+)", result.stdout, re.MULTILINE))
+    for encoder in ENCODER_SETTINGS:
+        # libx264 is the fallback below; probing it would only cost startup time
+        if encoder != "libx264" and encoder in listed and _encoder_works(encoder):
+            return encoder
+    return "libx264"
+
+VIDEO_ENCODER = _pick_encoder()
+# Guards the switch to libx264 when the hardware encoder fails mid-run
+_encoder_lock = threading.Lock()
+
+# Several narrow encodes keep the cores busier than one wide one
+FFMPEG_THREADS = 4
+MAX_EDIT_WORKERS = max(1, (os.cpu_count() or 1) // FFMPEG_THREADS)
+# Clips per FFmpeg process; bounds the filtergraph size
+EDIT_BATCH_SIZE = 8
+
 # Styles
 FONT_NAME = "Futura Heavy"
 FONT_SIZE = 110
 HIGHLIGHT_COLOR = "&H0000E6FF"  # Targeted Viral Yellow
 
+# One caption line; Pop Animation: Growing 100 -> 125 -> 100
+DIALOGUE_TEMPLATE = (
+    "Dialogue: 0,{start},{end},Default,,0,0,0,,"
+    "{{\\c%s\\fscx100\\fscy100\\t(0,100,\\fscx125\\fscy125)\\t(100,200,\\fscx100\\fscy100)}}{text}" % HIGHLIGHT_COLOR
+)
+
+def load_json(path):
+    """Load a JSON file, with orjson when it is installed."""
+    if orjson:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 def format_timestamp(seconds):
     """Convert seconds to ASS timestamp format (H:MM:SS.cc)"""
-    td = timedelta(seconds=seconds)
-    total_seconds = max(0, td.total_seconds())
-    hours = int(total_seconds // 3600)
-    minutes = int((total_seconds % 3600) // 60)
-    secs = total_seconds % 60
-    return f"{hours}:{minutes:02d}:{secs:05.2f}"
-
-def get_word_level_captions(clip_name, full_transcript, highlights):
-    """Extract exact word timings for a specific clip."""
-    match = re.search(r"clip_(\d+)", clip_name)
-    if not match: return []
+    cs = max(0, int(round(seconds * 100)))
+    hours, rem = divmod(cs, 360000)
+    minutes, rem = divmod(rem, 6000)
+    return f"{hours}:{minutes:02d}:{rem // 100:02d}.{rem % 100:02d}"
+
+def highlight_for_clip(clip_name, highlights):
+    """Return the highlight a clip was cut from (clip_01 -> highlights[0]), or None."""
+    match = CLIP_INDEX_RE.search(clip_name)
+    if not match: return None
     
     idx = int(match.group(1)) - 1
-    if idx < 0 or idx >= len(highlights): return []
+    if idx < 0 or idx >= len(highlights): return None
+    return highlights[idx]
+
+def metadata_path(output_path):
+    """Sidecar holding an edited clip's upload metadata: clip_01_viral.mp4 -> clip_01_viral.meta.json"""
+    return output_path.with_name(f"{output_path.stem}.meta.json")
+
+def partial_path(output_path):
+    """Name an edit is muxed under until it is complete: clip_01_viral.mp4 -> clip_01_viral.mp4.part"""
+    return output_path.with_name(f"{output_path.name}.part")
+
+def write_clip_metadata(clip_name, output_path, highlights):
+    """Store the clip's title and hashtags next to it, so the uploader needs no highlights lookup."""
+    highlight = highlight_for_clip(clip_name, highlights)
+    if highlight is None:
+        return
+    meta = {key: highlight[key] for key in ("title", "hashtags") if key in highlight}
+    with open(metadata_path(output_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+def get_word_level_captions(clip_name, full_transcript, highlights, starts=None):
+    """
+    Extract exact word timings for a specific clip as (rel_starts, rel_ends, texts) lists.
+    full_transcript must be sorted by start; starts is its list of start times (built if omitted).
+    """
+    highlight = highlight_for_clip(clip_name, highlights)
+    if highlight is None: return [], [], []
     
-    highlight = highlights[idx]
     start_time = highlight['start']
     end_time = highlight['end']
     
-    clip_words = []
-    for seg in full_transcript:
-        if seg['start'] >= start_time and seg['end'] <= end_time:
-            word_seg = seg.copy()
-            word_seg['start'] = max(0, seg['start'] - start_time)
-            word_seg['end'] = max(0, seg['end'] - start_time)
-            clip_words.append(word_seg)
-    return clip_words
-
-def generate_ass_file(clip_name, word_segments):
+    if starts is None:
+        starts = [seg['start'] for seg in full_transcript]
+    lo = bisect_left(starts, start_time)
+    hi = bisect_right(starts, end_time, lo)
+
+    # Parallel lists instead of a shifted copy of every word dict
+    rel_starts, rel_ends, texts = [], [], []
+    for seg in full_transcript[lo:hi]:
+        if seg['end'] <= end_time:
+            rel_starts.append(max(0, seg['start'] - start_time))
+            rel_ends.append(max(0, seg['end'] - start_time))
+            texts.append(seg['text'])
+    return rel_starts, rel_ends, texts
+
+def generate_ass_file(clip_name, captions):
     """Create a high-end subtitle file with pop animations."""
-    ass_path = Path(EDITED_DIR) / f"{clip_name}.ass"
+    ass_path = Path(ASS_DIR) / f"{clip_name}.ass"
     header = f"""[Script Info]
 ScriptType: v4.00+
 PlayResX: 1080
@@ -86,118 +204,227 @@ Style: Default,{FONT_NAME},{FONT_SIZE},&H00FFFFFF,{HIGHLIGHT_COLOR},&H00000000,&
 [Events]
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 """
-    dialogues = []
-    for word in word_segments:
-        start = format_timestamp(word['start'])
-        end = format_timestamp(word['end'])
-        clean_text = word['text'].strip().upper()
-        # Pop Animation: Growing 100 -> 125 -> 100
-        text = f"{{\\c{HIGHLIGHT_COLOR}\\fscx100\\fscy100\\t(0,100,\\fscx125\\fscy125)\\t(100,200,\\fscx100\\fscy100)}}{clean_text}"
-        dialogues.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}")
-        
+    # Upper-case every caption in one call; NUL never appears in transcript text
+    rel_starts, rel_ends, texts = captions
+    texts = "\0".join([text.strip() for text in texts]).upper().split("\0")
+    dialogues = "\n".join([
+        DIALOGUE_TEMPLATE.format(start=format_timestamp(start), end=format_timestamp(end), text=text)
+        for start, end, text in zip(rel_starts, rel_ends, texts)
+    ])
+
     with open(ass_path, "w", encoding="utf-8") as f:
-        f.write(header + "\n".join(dialogues))
+        f.write(header + dialogues)
     return ass_path
 
+BG_CACHE_DIR = os.path.join(BG_VIDEOS_DIR, "_cache")
+_bg_cache_lock = threading.Lock()
+
+def _ensure_prepared_bg(path):
+    """Scale/crop a BG video to the 720x853 bottom panel once and return the cached copy."""
+    cached = Path(BG_CACHE_DIR) / f"{path.stem}_720x853.mp4"
+    with _bg_cache_lock:
+        if cached.exists() and cached.stat().st_mtime >= path.stat().st_mtime:
+            return cached
+
+        logger.info(f"🛠️ Preparing background {path.name}...")
+        os.makedirs(BG_CACHE_DIR, exist_ok=True)
+        tmp_path = cached.with_suffix(".tmp.mp4")
+        cmd = [
+            FFMPEG_PATH, "-hide_banner", "-loglevel", "error",
+            "-i", str(path),
+            "-vf", "scale=720:-2:force_original_aspect_ratio=decrease,crop=720:853",
+            "-c:v", "libx264", "-preset", "fast", "-crf", "18", "-an",
+            "-y", str(tmp_path)
+        ]
+        try:
+            subprocess.run(cmd, check=True)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"❌ Could not prepare background {path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return None
+        os.replace(tmp_path, cached)
+        return cached
+
 def get_random_bg_video():
     bg_path = Path(BG_VIDEOS_DIR)
     videos = list(bg_path.glob("*.mp4")) + list(bg_path.glob("*.mov"))
-    return random.choice(videos) if videos else None
+    return _ensure_prepared_bg(random.choice(videos)) if videos else None
 
-def apply_pro_edits(clip_path, highlights, full_transcript):
-    clip_name = clip_path.stem
-    output_path = Path(EDITED_DIR) / f"{clip_name}_viral.mp4"
-    
-    if output_path.exists():
-        logger.info(f"⏭️  Skipping {clip_name} (already edited)")
-        return
+# Path escaping for FFmpeg filter arguments (macOS/Unix)
+FILTER_PATH_ESCAPES = str.maketrans({":": "\\:", "'": "\\'"})
+SAFE_FONTS_DIR = str(FONTS_DIR).translate(FILTER_PATH_ESCAPES)
+
+def escape_filter_path(path):
+    """Escape a path for use inside an FFmpeg filter argument."""
+    return str(path).translate(FILTER_PATH_ESCAPES)
 
-    word_segments = get_word_level_captions(clip_name, full_transcript, highlights)
-    if not word_segments:
-        logger.warning(f"⚠️ No transcript found for {clip_name}. Copying raw.")
-        subprocess.run([FFMPEG_PATH, "-i", str(clip_path), "-c", "copy", str(output_path), "-y"], check=True)
+def run_edit(build_cmd, label):
+    """Run an edit with VIDEO_ENCODER, switching to libx264 for good if only the hardware encoder fails."""
+    global VIDEO_ENCODER
+    encoder = VIDEO_ENCODER
+    try:
+        subprocess.run(build_cmd(encoder), check=True)
         return
+    except subprocess.CalledProcessError:
+        if encoder == "libx264":
+            raise
+        logger.warning(f"⚠️ {encoder} failed for {label}, retrying with libx264")
+
+    # Raises on a bad input/subtitle/filtergraph, which says nothing about the hardware encoder
+    subprocess.run(build_cmd("libx264"), check=True)
+    # The CPU encode worked, so the device went away after the startup probe; stop trying it for every batch
+    with _encoder_lock:
+        if VIDEO_ENCODER == encoder:
+            logger.warning(f"⚠️ Using libx264 instead of {encoder} from now on")
+            VIDEO_ENCODER = "libx264"
+
+def apply_pro_edits(clip_path, highlights, full_transcript, starts=None):
+    return apply_pro_edits_batch([clip_path], highlights, full_transcript, starts)[0]
+
+def apply_pro_edits_batch(clip_paths, highlights, full_transcript, starts=None):
+    """Edit several clips in one FFmpeg process; returns one result per clip."""
+    results = [None] * len(clip_paths)
+    jobs = []  # (result index, clip path, output path, ass path)
+
+    for pos, clip_path in enumerate(clip_paths):
+        clip_name = clip_path.stem
+        output_path = Path(EDITED_DIR) / f"{clip_name}_viral.mp4"
+
+        if output_path.exists():
+            logger.info(f"⏭️  Skipping {clip_name} (already edited)")
+            continue
+
+        # Written before the clip itself, so a watching uploader never sees the clip without it
+        write_clip_metadata(clip_name, output_path, highlights)
+
+        captions = get_word_level_captions(clip_name, full_transcript, highlights, starts)
+        if not captions[2]:
+            logger.warning(f"⚠️ No transcript found for {clip_name}. Copying raw.")
+            # Nothing to burn in: remux only
+            subprocess.run([
+                FFMPEG_PATH, "-hide_banner", "-loglevel", "error",
+                "-i", str(clip_path), "-c", "copy", "-movflags", "+faststart",
+                "-f", "mp4", "-y", str(partial_path(output_path))
+            ], check=True)
+            os.replace(partial_path(output_path), output_path)
+            continue
+
+        jobs.append((pos, clip_path, output_path, generate_ass_file(clip_name, captions)))
+
+    if not jobs:
+        return results
 
-    ass_path = generate_ass_file(clip_name, word_segments)
     bg_video = get_random_bg_video()
-    
-    # Path escaping for FFmpeg (macOS/Unix)
-    safe_ass_path = str(ass_path).replace(":", "\\:").replace("'", "\\'")
-    safe_fonts_dir = str(FONTS_DIR).replace(":", "\\:").replace("'", "\\'")
+    filters = []
 
     if bg_video:
-        logger.info(f"🎬 Editing {clip_name} (Top 1/3: Main, Bottom 2/3: Gameplay)...")
-        filter_complex = (
-            "[0:v]scale=720:1440:force_original_aspect_ratio=decrease,"
-            "pad=720:1280:(ow-iw)/2:(oh-ih)/2[main];"
-            "[1:v]scale=720:-2:force_original_aspect_ratio=decrease,"
-            "crop=720:853,format=rgba[bg];"
-            f"[main][bg]overlay=0:426:shortest=1,ass=filename='{safe_ass_path}':fontsdir='{safe_fonts_dir}'"
-        )
-        cmd = [
-            FFMPEG_PATH, "-hide_banner", "-loglevel", "error",
-            "-i", str(clip_path), "-stream_loop", "-1", "-i", str(bg_video),
-            "-filter_complex", filter_complex,
-            "-c:v", "libx264", "-preset", "veryfast", "-crf", "22",
-            "-map", "0:a", "-shortest", "-movflags", "+faststart", "-y", str(output_path)
-        ]
+        # Input 0 is the prepared gameplay loop, decoded once and split across every clip
+        split_labels = "".join(f"[bg{k}]" for k in range(len(jobs)))
+        filters.append(f"[0:v]format=rgba,split={len(jobs)}{split_labels}")
+        for k, (_, clip_path, _, ass_path) in enumerate(jobs):
+            logger.info(f"🎬 Editing {clip_path.stem} (Top 1/3: Main, Bottom 2/3: Gameplay)...")
+            filters.append(
+                f"[{k + 1}:v]scale=720:1440:force_original_aspect_ratio=decrease,"
+                f"pad=720:1280:(ow-iw)/2:(oh-ih)/2[main{k}];"
+                f"[main{k}][bg{k}]overlay=0:426:shortest=1,"
+                f"ass=filename='{escape_filter_path(ass_path)}':fontsdir='{SAFE_FONTS_DIR}'[v{k}]"
+            )
     else:
-        logger.info(f"🎬 Editing {clip_name} (No BG found, falling back to blur)...")
-        filter_complex = (
-            "[0:v]scale=720:1440:force_original_aspect_ratio=decrease,"
-            "pad=720:1280:(ow-iw)/2:(oh-ih)/2[main];"
-            "[0:v]scale=720:1280:force_original_aspect_ratio=increase,crop=720:1280,boxblur=20:10[bg];"
-            f"[bg][main]overlay=0:0,ass=filename='{safe_ass_path}':fontsdir='{safe_fonts_dir}'"
-        )
-        cmd = [
-            FFMPEG_PATH, "-hide_banner", "-loglevel", "error",
-            "-i", str(clip_path), "-filter_complex", filter_complex,
-            "-c:v", "libx264", "-preset", "veryfast", "-crf", "22",
-            "-c:a", "copy", "-movflags", "+faststart", "-y", str(output_path)
-        ]
+        for k, (_, clip_path, _, ass_path) in enumerate(jobs):
+            logger.info(f"🎬 Editing {clip_path.stem} (No BG found, falling back to blur)...")
+            filters.append(
+                f"[{k}:v]scale=720:1440:force_original_aspect_ratio=decrease,"
+                f"pad=720:1280:(ow-iw)/2:(oh-ih)/2[main{k}];"
+                f"[{k}:v]scale=720:1280:force_original_aspect_ratio=increase,crop=720:1280,boxblur=20:10[bg{k}];"
+                f"[bg{k}][main{k}]overlay=0:0,"
+                f"ass=filename='{escape_filter_path(ass_path)}':fontsdir='{SAFE_FONTS_DIR}'[v{k}]"
+            )
+    filter_complex = ";".join(filters)
+
+    def build_cmd(encoder):
+        input_args, codec_args = ENCODER_SETTINGS[encoder]
+        cmd = [FFMPEG_PATH, "-hide_banner", "-loglevel", "error"]
+        if bg_video:
+            cmd += ["-stream_loop", "-1", *input_args, "-i", str(bg_video)]
+        for _, clip_path, _, _ in jobs:
+            cmd += [*input_args, "-i", str(clip_path)]
+        cmd += ["-filter_complex", filter_complex]
 
+        for k, (_, _, output_path, _) in enumerate(jobs):
+            if bg_video:
+                audio_args = ["-map", f"{k + 1}:a", "-shortest"]
+            else:
+                audio_args = ["-map", f"{k}:a?", "-c:a", "copy"]
+            cmd += [
+                "-map", f"[v{k}]", *audio_args,
+                *codec_args, "-threads", str(FFMPEG_THREADS),
+                # The uploader only picks up .mp4 names, so mux under a temporary one
+                "-movflags", "+faststart", "-f", "mp4", "-y", str(partial_path(output_path))
+            ]
+        return cmd
+
+    label = jobs[0][1].stem if len(jobs) == 1 else f"{len(jobs)} clips"
     try:
-        subprocess.run(cmd, check=True)
-        logger.info(f"✨ Edited: {output_path.name}")
-        return True
+        run_edit(build_cmd, label)
+        for pos, _, output_path, _ in jobs:
+            os.replace(partial_path(output_path), output_path)
+            logger.info(f"✨ Edited: {output_path.name}")
+            results[pos] = True
+        return results
     except subprocess.CalledProcessError as e:
-        logger.error(f"❌ Edit failed for clip {clip_name}: {e}")
-        return False
+        logger.error(f"❌ Edit failed for {label}: {e}")
+        for pos, _, output_path, _ in jobs:
+            results[pos] = False
+            # Drop partial outputs so they do not pile up next to the finished clips
+            partial_path(output_path).unlink(missing_ok=True)
+            metadata_path(output_path).unlink(missing_ok=True)
     finally:
-        if ass_path.exists():
-            ass_path.unlink()
+        for _, _, _, ass_path in jobs:
+            if ass_path.exists():
+                ass_path.unlink()
+
+    if len(jobs) > 1:
+        # Retry one by one so a single bad clip doesn't fail the whole batch
+        for pos, clip_path, _, _ in jobs:
+            results[pos] = apply_pro_edits(clip_path, highlights, full_transcript, starts)
+    return results
+
+def scan_files(directory, match):
+    """List the files in directory whose name passes match, in one scandir pass."""
+    try:
+        with os.scandir(directory) as entries:
+            return [e for e in entries if match(e.name) and e.is_file()]
+    except FileNotFoundError:
+        return []
 
 def cleanup(h_file_path):
     video_stem = h_file_path.stem.replace("_simple_highlights", "").replace("_highlights", "")
     logger.info(f"🧹 Starting cleanup for: {video_stem}")
     
     # 1. Delete original download
-    for ext in [".mp4", ".mkv", ".mov", ".webm"]:
-        video_path = Path(DOWNLOADS_DIR) / f"{video_stem}{ext}"
-        if video_path.exists():
-            video_path.unlink()
-            logger.info(f"Removed download: {video_path.name}")
+    download_names = {f"{video_stem}{ext}" for ext in [".mp4", ".mkv", ".mov", ".webm"]}
+    for entry in scan_files(DOWNLOADS_DIR, lambda name: name in download_names):
+        os.unlink(entry.path)
+        logger.info(f"Removed download: {entry.name}")
 
     # 2. Delete transcripts
-    t_full = Path(TRANSCRIPTS_FULL_DIR) / f"{video_stem}.json"
-    if t_full.exists():
-        t_full.unlink()
-        logger.info(f"Removed full transcript: {t_full.name}")
-        
-    t_simple = Path(TRANSCRIPTS_DIR) / f"{video_stem}_simple.json"
-    if t_simple.exists():
-        t_simple.unlink()
-        logger.info(f"Removed simple transcript: {t_simple.name}")
+    for t_path, kind in ((Path(TRANSCRIPTS_FULL_DIR) / f"{video_stem}.json", "full"),
+                         (Path(TRANSCRIPTS_DIR) / f"{video_stem}_simple.json", "simple")):
+        try:
+            t_path.unlink()
+            logger.info(f"Removed {kind} transcript: {t_path.name}")
+        except FileNotFoundError:
+            pass
 
     # 3. Delete raw clips
-    for clip in Path(CLIPS_DIR).glob("clip_*.mp4"):
-        clip.unlink()
-        logger.info(f"Removed raw clip: {clip.name}")
+    for entry in scan_files(CLIPS_DIR, lambda name: name.startswith("clip_") and name.endswith(".mp4")):
+        os.unlink(entry.path)
+        logger.info(f"Removed raw clip: {entry.name}")
 
 def main():
     logger.info("============================================================")
     logger.info("🎨 Viral Video Editor Starting")
-    logger.info(f"🔨 Using FFmpeg: {FFMPEG_PATH}")
+    logger.info(f"🔨 Using FFmpeg: {FFMPEG_PATH} (encoder: {VIDEO_ENCODER})")
     logger.info("============================================================")
     
     h_files = list(Path(HIGHLIGHTS_DIR).glob("*_highlights.json"))
@@ -217,23 +444,30 @@ def main():
             continue
 
         logger.info(f"📦 Processing Video: {video_stem}")
-        with open(h_file, "r", encoding="utf-8") as f:
-            highlights = json.load(f)
-        with open(t_file, "r", encoding="utf-8") as f:
-            transcript = json.load(f)
+        highlights = load_json(h_file)
+        transcript = load_json(t_file)
+        # Sorted once so each clip's words are found by binary search
+        transcript.sort(key=lambda seg: seg['start'])
+        starts = [seg['start'] for seg in transcript]
 
         clips = list(Path(CLIPS_DIR).glob("clip_*.mp4"))
         if not clips:
             logger.info(f"No clips found for {video_stem}. Run Clipper first.")
             continue
 
-        clips.sort(key=lambda x: int(re.search(r"(\d+)", x.name).group(1)))
+        clips.sort(key=lambda x: int(NUMBER_RE.search(x.name).group(1)))
+
+        # Spread the clips over the workers, at most EDIT_BATCH_SIZE per FFmpeg process
+        batch_size = min(EDIT_BATCH_SIZE, math.ceil(len(clips) / MAX_EDIT_WORKERS))
+        batches = [clips[i:i + batch_size] for i in range(0, len(clips), batch_size)]
+
+        edit = partial(apply_pro_edits_batch, highlights=highlights, full_transcript=transcript, starts=starts)
+        with ThreadPoolExecutor(max_workers=MAX_EDIT_WORKERS) as executor:
+            results = [r for batch_results in executor.map(edit, batches) for r in batch_results]
 
-        video_success = True
-        for clip in clips:
-            if not apply_pro_edits(clip, highlights, transcript):
-                video_success = False
-                global_success = False
+        video_success = all(results)
+        if not video_success:
+            global_success = False
 
         if video_success:
             cleanup(h_file)
@@ -251,5 +485,4 @@ def main():
         logger.info("📭 No videos were eligible for editing.")
 
 if __name__ == "__main__":
-    import sys
     main()
@@ -1,11 +1,16 @@
 import os
 import json
 import logging
-import re
 from pathlib import Path
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional: it only speeds up loading large transcripts
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
@@ -69,6 +74,14 @@ Return ONLY a valid JSON array of objects with this exact structure:
 Now, analyze the following timecoded transcript segments and find the viral gold:
 """
 
+def load_json(path):
+    """Load a JSON file, with orjson when it is installed."""
+    if orjson:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 def load_transcript():
     """Load the first available simplified transcript."""
     files = list(Path(TRANSCRIPT_SIMPLE_DIR).glob("*.json"))
@@ -79,13 +92,50 @@ def load_transcript():
     # Process the first one found (or we could loop if needed)
     file_path = files[0]
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            transcript = json.load(f)
+        transcript = load_json(file_path)
         return transcript, file_path
     except Exception as e:
         logger.error("Failed to load transcript %s: %s", file_path, e)
         return None, None
 
+def extract_json_array(chunks):
+    """
+    Return the first top-level JSON array in a stream of text chunks, or None.
+    Brackets are counted (ignoring those inside strings) so reading stops as soon as it closes.
+    """
+    parse = orjson.loads if orjson else json.loads
+    buf = []
+    depth = 0
+    in_string = escaped = False
+    for chunk in chunks:
+        for ch in chunk:
+            if depth == 0:
+                # Outside an array: skip prose and Markdown fences
+                if ch != "[":
+                    continue
+                buf = []
+            buf.append(ch)
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "[":
+                depth += 1
+            elif ch == "]":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        return parse("".join(buf))
+                    except ValueError:
+                        # Bracketed prose like "[sic]"; keep looking
+                        continue
+    return None
+
 def find_highlights(transcript, filename):
     """Use Gemini AI to find engaging or viral moments."""
     # Prepare transcript for Gemini (include timestamps this time!)
@@ -102,36 +152,25 @@ def find_highlights(transcript, filename):
         # Use gemini-2.5-flash for speed and reliability, supports long context
         model = genai.GenerativeModel("gemini-2.5-flash")
         logger.info("Sending transcript to Gemini (analyzing viral potential)...")
-        response = model.generate_content(prompt)
-        
-        if not response or not response.text:
-            logger.error("Gemini returned an empty response.")
-            return []
+        response = model.generate_content(prompt, stream=True)
 
-        text = response.text.strip()
-        # Clean up Markdown
-        text = text.replace("```json", "").replace("```", "").strip()
-        
-        # Robust JSON extraction
-        match = re.search(r"\[.*\]", text, re.DOTALL)
-        if match:
-            json_text = match.group(0)
-            highlights = json.loads(json_text)
-            
-            # Validate duration constraints locally
-            validated = []
-            for h in highlights:
-                duration = h['end'] - h['start']
-                if 18 <= duration <= 60: # Allow slight wiggle room for AI
-                    validated.append(h)
-                else:
-                    logger.warning(f"Clip '{h['title']}' rejected due to duration: {duration:.1f}s")
-            
-            return validated
-        else:
+        # Parse while Gemini is still generating and stop once the array closes
+        highlights = extract_json_array(chunk.text for chunk in response)
+        if highlights is None:
             logger.warning("No JSON array found in Gemini output.")
             return []
 
+        # Validate duration constraints locally
+        validated = []
+        for h in highlights:
+            duration = h['end'] - h['start']
+            if 18 <= duration <= 60: # Allow slight wiggle room for AI
+                validated.append(h)
+            else:
+                logger.warning(f"Clip '{h['title']}' rejected due to duration: {duration:.1f}s")
+
+        return validated
+
     except Exception as e:
         logger.error(f"AI Highlight detection failed for {filename}: {e}")
         return []
@@ -150,15 +189,18 @@ def main():
     if out_path.exists():
         logger.info(f"✅ Highlights already exist for {file_path.name}")
         # Optionally load and return them for debug
-        with open(out_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_json(out_path)
 
     logger.info(f"🔍 Analyzing video: {file_path.name}")
     highlights = find_highlights(transcript, file_path.name)
     
     if highlights:
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(highlights, f, ensure_ascii=False, indent=2)
+        if orjson:
+            with open(out_path, "wb") as f:
+                f.write(orjson.dumps(highlights, option=orjson.OPT_INDENT_2))
+        else:
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(highlights, f, ensure_ascii=False, indent=2)
         logger.info(f"✅ Found {len(highlights)} viral moments!")
         logger.info(f"💾 Highlights saved to {out_path}")
     else:
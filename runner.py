@@ -1,5 +1,6 @@
 import os
 import sys
+import importlib
 import subprocess
 import logging
 from pathlib import Path
@@ -16,12 +17,16 @@ except ImportError:
         logger.error("Could not import db_helpers. Check PYTHONPATH.")
         return 0
 
+RUNNER_LOG = os.path.join(BASE_DIR, "workflow_runner.log")
+# Read size when relaying a child's output in unattended runs
+TEE_CHUNK_SIZE = 64 * 1024
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
     handlers=[
-        logging.FileHandler("workflow_runner.log"),
+        logging.FileHandler(RUNNER_LOG),
         logging.StreamHandler()
     ]
 )
@@ -30,6 +35,12 @@ logger = logging.getLogger("WorkflowRunner")
 # Relative paths from project root
 EDITED_CLIPS_DIR = Path(BASE_DIR) / "edited_clips"
 
+# Stages run in this interpreter by default; RUNNER_SUBPROCESS=1 restores one process per stage
+USE_SUBPROCESS = os.getenv("RUNNER_SUBPROCESS", "0") == "1"
+# Always get their own process: the Whisper model and CUDA context are only freed when it exits,
+# and the transcriber's basicConfig (which adds transcriber.log) is a no-op once ours has run
+SUBPROCESS_STAGES = {"transcriber/Transcriber.py"}
+
 def run_command(command, env_updates=None):
     """Run a python script as a subprocess."""
     env = os.environ.copy()
@@ -43,18 +54,43 @@ def run_command(command, env_updates=None):
         env["PYTHONPATH"] = BASE_DIR
 
     logger.info(f"🚀 Executing: {' '.join(command)}")
-    process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-    
-    # Stream output to logger
-    for line in process.stdout:
-        logger.info(f"  [Output] {line.strip()}")
-    
-    process.wait()
+    if sys.stdout.isatty():
+        # Interactive: the child writes straight to our terminal
+        process = subprocess.run(command, env=env, stderr=subprocess.STDOUT)
+    else:
+        # Unattended (docker, cron): tee the child's raw output to our stdout and the runner log
+        with open(RUNNER_LOG, "ab", buffering=0) as log_file, \
+                subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT) as process:
+            fd = process.stdout.fileno()
+            # Whatever the child has written so far, not line by line
+            while chunk := os.read(fd, TEE_CHUNK_SIZE):
+                sys.stdout.buffer.write(chunk)
+                sys.stdout.buffer.flush()
+                log_file.write(chunk)
+
     if process.returncode != 0:
         logger.error(f"❌ Command failed with return code {process.returncode}")
         return False
     return True
 
+def run_stage(script):
+    """Run a pipeline script's main(), in-process unless USE_SUBPROCESS is set or it is a SUBPROCESS_STAGES entry."""
+    if USE_SUBPROCESS or script in SUBPROCESS_STAGES:
+        return run_command(["python3", os.path.join(BASE_DIR, script)])
+
+    module_name = os.path.splitext(script)[0].replace("/", ".")
+    logger.info(f"🚀 Running: {module_name}.main()")
+    try:
+        importlib.import_module(module_name).main()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            logger.error(f"❌ Stage exited with code {e.code}")
+            return False
+    except Exception as e:
+        logger.exception(f"❌ Stage raised: {e}")
+        return False
+    return True
+
 def has_ready_clips():
     """Check if there are any .mp4 files in edited_clips that aren't in 'uploaded'."""
     if not EDITED_CLIPS_DIR.exists():
@@ -70,7 +106,7 @@ def main():
     # 1. If there are clips ready to publish, publish one, then stop
     if has_ready_clips():
         logger.info("✨ Found ready-to-publish clips. Starting uploader...")
-        if run_command(["python3", "uploader/uploader.py"]):
+        if run_stage("uploader/uploader.py"):
             logger.info("✅ Single upload task finished. stopping.")
         else:
             logger.error("Failed to upload the existing clip.")
@@ -101,19 +137,17 @@ def main():
     logger.info("⚙️ Starting full pipeline (Download -> Transcribe -> Highlight -> Clip -> Edit -> Upload)...")
     
     pipeline = [
-        ["python3", "downloader/Downloader.py"],
-        ["python3", "transcriber/Transcriber.py"],
-        ["python3", "highlighter/HighlightFinder.py"],
-        ["python3", "clipper/ClipGenerator.py"],
-        ["python3", "editor/VideoEditor.py"],
-        ["python3", "uploader/uploader.py"]
+        "downloader/Downloader.py",
+        "transcriber/Transcriber.py",
+        "highlighter/HighlightFinder.py",
+        "clipper/ClipGenerator.py",
+        "editor/VideoEditor.py",
+        "uploader/uploader.py"
     ]
 
-    for cmd in pipeline:
-        # We run the command relative to BASE_DIR
-        cmd[1] = os.path.join(BASE_DIR, cmd[1])
-        if not run_command(cmd):
-            logger.error(f"💀 Pipeline BROKE at step: {' '.join(cmd)}")
+    for script in pipeline:
+        if not run_stage(script):
+            logger.error(f"💀 Pipeline BROKE at step: {script}")
             return
 
     logger.info("🎯 Workflow completed successfully. one full video processed and uploaded.")
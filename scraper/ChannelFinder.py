@@ -1,7 +1,11 @@
 import os
 import sys
 import json
+import time
+import hashlib
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from googleapiclient.discovery import build
 import google.generativeai as genai
@@ -24,66 +28,43 @@ API_KEY = os.getenv("YT_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 # Initialize APIs
-YOUTUBE = build("youtube", "v3", developerKey=API_KEY)
 genai.configure(api_key=GEMINI_API_KEY)
 
-# ==================== MASTER PROMPT ====================
-MASTER_PROMPT = """You are an expert YouTube content analyst specializing in identifying viral, high-quality channels.
-
-Your mission: Analyze YouTube channels and determine if they are suitable for creating viral short-form content (TikTok, Reels, Shorts).
-
-**TARGET CONTENT CATEGORIES:**
-1. **Interviews** - Celebrity interviews, expert conversations, thought-provoking discussions
-2. **Self-Education** - Personal development, skill-building, life advice, productivity
-3. **Podcasts** - Long-form conversations, storytelling, deep-dive discussions
-
-**EVALUATION CRITERIA:**
-
-**VIRALITY POTENTIAL (40 points):**
-- High engagement rate (views/subscribers ratio)
-- Consistent viral moments (emotional, surprising, controversial)
-- Quotable, shareable content
-- Strong hooks and storytelling
-
-**CONTENT QUALITY (30 points):**
-- Professional production quality
-- Compelling guests/topics
-- Clear audio and video
-- Engaging presentation style
-
-**SHORT-FORM SUITABILITY (30 points):**
-- Contains highlight-worthy moments
-- Emotional peaks (laughter, shock, inspiration)
-- Standalone insights that work out of context
-- Visual interest (not just talking heads)
+# Channels are analyzed concurrently; every call is network-bound
+MAX_ANALYSIS_WORKERS = 8
+# channels.list accepts up to 50 comma-separated IDs
+CHANNELS_PER_REQUEST = 50
 
-**SCORING SYSTEM:**
-- 90-100: MUST ADD - Exceptional viral potential
-- 70-89: HIGHLY RECOMMENDED - Strong candidate
-- 50-69: CONSIDER - Decent potential
-- Below 50: SKIP - Not suitable
+# Gemini verdicts keyed by channel id, prompt and recent titles; live counters are
+# left out so a re-run hits, and new uploads or a prompt edit trigger re-analysis
+ANALYSIS_CACHE_FILE = Path(__file__).resolve().parent / ".cache" / "gemini_analyses.json"
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600  # seconds
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+_thread_local = threading.local()
+# Parses the first JSON object in a reply and ignores any trailing text
+_JSON_DECODER = json.JSONDecoder()
 
-**OUTPUT FORMAT:**
-Return ONLY a valid JSON object with this structure:
-{
-  "score": <number 0-100>,
-  "verdict": "<MUST ADD|HIGHLY RECOMMENDED|CONSIDER|SKIP>",
-  "reasoning": "<2-3 sentence explanation>",
-  "viral_potential": "<specific examples of viral moments>",
-  "content_category": "<interviews|self-education|podcasts|mixed>",
-  "recommended": <true|false>
-}
+def get_youtube():
+    """Return this thread's YouTube client (googleapiclient clients are not thread-safe)."""
+    if not hasattr(_thread_local, "youtube"):
+        _thread_local.youtube = build("youtube", "v3", developerKey=API_KEY)
+    return _thread_local.youtube
 
-**ANALYSIS GUIDELINES:**
-- Be selective - only recommend channels with genuine viral potential
-- Prioritize channels with proven track record of viral moments
-- Consider if content translates well to 15-40 second clips
-- Favor channels with emotional, surprising, or insightful content
-- Reject channels that are too niche, boring, or low-quality
-
-Now analyze the following channel:
+# ==================== MASTER PROMPT ====================
+MASTER_PROMPT = """You are a YouTube analyst picking channels whose videos can be cut into viral 15-40s shorts (TikTok, Reels, Shorts).
+Target categories: interviews, self-education, podcasts.
+Score 0-100 = virality (40: views/subs ratio, emotional or surprising quotable moments, strong hooks) + quality (30: production, guests/topics, clear A/V) + short-form fit (30: standalone highlight moments, emotional peaks, visual interest).
+Verdict: 90+ MUST ADD, 70-89 HIGHLY RECOMMENDED, 50-69 CONSIDER, <50 SKIP. Be selective; reject niche, boring or low-quality channels.
+Return ONLY this JSON:
+{"score": <0-100>, "verdict": "<MUST ADD|HIGHLY RECOMMENDED|CONSIDER|SKIP>", "reasoning": "<2-3 sentences>", "viral_potential": "<specific viral moments>", "content_category": "<interviews|self-education|podcasts|mixed>", "recommended": <true|false>}
 """
 
+# The prompt is a fixed system instruction, so each request only carries the channel summary
+ANALYSIS_MODEL = genai.GenerativeModel("gemini-2.5-flash", system_instruction=MASTER_PROMPT)
+# Part of every analysis cache key, so editing the prompt invalidates old verdicts
+MASTER_PROMPT_HASH = hashlib.sha256(MASTER_PROMPT.encode("utf-8")).hexdigest()
+
 # ==================== CHANNEL DISCOVERY ====================
 
 SEARCH_QUERIES = [
@@ -98,7 +79,7 @@ SEARCH_QUERIES = [
 def search_channels_by_query(query, max_results=5):  # Reduced from 10 to 5
     """Search for channels using YouTube API."""
     try:
-        search_response = YOUTUBE.search().list(
+        search_response = get_youtube().search().list(
             q=query,
             type="channel",
             part="id,snippet",
@@ -115,37 +96,45 @@ def search_channels_by_query(query, max_results=5):  # Reduced from 10 to 5
 
 def get_channel_details(channel_id):
     """Get detailed channel information."""
-    try:
-        response = YOUTUBE.channels().list(
-            part="snippet,statistics,contentDetails",
-            id=channel_id
-        ).execute()
-        
-        if not response.get("items"):
-            return None
+    return get_channel_details_batch([channel_id]).get(channel_id)
+
+def get_channel_details_batch(channel_ids):
+    """Get details for many channels, 50 IDs per request. Returns {channel_id: info}."""
+    channel_ids = list(channel_ids)
+    details = {}
+    for start in range(0, len(channel_ids), CHANNELS_PER_REQUEST):
+        chunk = channel_ids[start:start + CHANNELS_PER_REQUEST]
+        try:
+            response = get_youtube().channels().list(
+                part="snippet,statistics,contentDetails",
+                id=",".join(chunk),
+                maxResults=CHANNELS_PER_REQUEST
+            ).execute()
+        except Exception as e:
+            logger.error(f"Failed to get details for channels {chunk}: {e}")
+            continue
+
+        for channel in response.get("items", []):
+            channel_id = channel["id"]
+            snippet = channel["snippet"]
+            stats = channel["statistics"]
             
-        channel = response["items"][0]
-        snippet = channel["snippet"]
-        stats = channel["statistics"]
-        
-        return {
-            "id": channel_id,
-            "title": snippet["title"],
-            "description": snippet.get("description", "")[:500],  # Limit description length
-            "subscriber_count": int(stats.get("subscriberCount", 0)),
-            "video_count": int(stats.get("videoCount", 0)),
-            "view_count": int(stats.get("viewCount", 0)),
-            "country": snippet.get("country", "Unknown"),
-            "url": f"https://youtube.com/channel/{channel_id}"
-        }
-    except Exception as e:
-        logger.error(f"Failed to get details for channel {channel_id}: {e}")
-        return None
+            details[channel_id] = {
+                "id": channel_id,
+                "title": snippet["title"],
+                "description": snippet.get("description", "")[:500],  # Limit description length
+                "subscriber_count": int(stats.get("subscriberCount", 0)),
+                "video_count": int(stats.get("videoCount", 0)),
+                "view_count": int(stats.get("viewCount", 0)),
+                "country": snippet.get("country", "Unknown"),
+                "url": f"https://youtube.com/channel/{channel_id}"
+            }
+    return details
 
 def get_recent_videos(channel_id, max_results=5):
     """Get recent videos from a channel to analyze content."""
     try:
-        search_response = YOUTUBE.search().list(
+        search_response = get_youtube().search().list(
             channelId=channel_id,
             part="id,snippet",
             maxResults=max_results,
@@ -165,6 +154,44 @@ def get_recent_videos(channel_id, max_results=5):
         logger.error(f"Failed to get videos for channel {channel_id}: {e}")
         return []
 
+def _get_analysis_cache():
+    """Load the analysis cache from disk on first use (caller holds the lock)."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        try:
+            with open(ANALYSIS_CACHE_FILE, "r", encoding="utf-8") as f:
+                _analysis_cache = json.load(f)
+        except (OSError, ValueError):
+            _analysis_cache = {}
+    return _analysis_cache
+
+def get_cached_analysis(key):
+    """Return a cached Gemini verdict younger than ANALYSIS_CACHE_TTL, or None."""
+    with _analysis_cache_lock:
+        entry = _get_analysis_cache().get(key)
+    if entry and time.time() - entry["cached_at"] < ANALYSIS_CACHE_TTL:
+        return dict(entry["analysis"])
+    return None
+
+def store_analysis(key, analysis):
+    """Remember a Gemini verdict in memory; save_analysis_cache persists it."""
+    with _analysis_cache_lock:
+        _get_analysis_cache()[key] = {"cached_at": time.time(), "analysis": analysis}
+
+def save_analysis_cache():
+    """Write the cache back to disk, dropping expired entries."""
+    with _analysis_cache_lock:
+        if _analysis_cache is None:
+            return
+        now = time.time()
+        fresh = {k: v for k, v in _analysis_cache.items() if now - v["cached_at"] < ANALYSIS_CACHE_TTL}
+        try:
+            ANALYSIS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(ANALYSIS_CACHE_FILE, "w", encoding="utf-8") as f:
+                json.dump(fresh, f)
+        except OSError as e:
+            logger.warning(f"Could not save Gemini analysis cache: {e}")
+
 def analyze_channel_with_gemini(channel_info, recent_videos):
     """Use Gemini AI to analyze if channel is suitable."""
     
@@ -185,20 +212,28 @@ RECENT VIDEO TITLES:
     for i, video in enumerate(recent_videos, 1):
         channel_summary += f"{i}. {video['title']}\n"
     
+    cache_key = hashlib.sha256("\n".join(
+        [channel_info['id'], MASTER_PROMPT_HASH]
+        + [video['title'] for video in recent_videos]
+    ).encode("utf-8")).hexdigest()
+    cached = get_cached_analysis(cache_key)
+    if cached is not None:
+        logger.info(f"♻️  Using cached analysis for {channel_info['title']}")
+        return cached
+
     # Call Gemini
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(MASTER_PROMPT + channel_summary)
+        response = ANALYSIS_MODEL.generate_content(channel_summary)
         
         # Parse JSON response
         text = response.text.strip()
         text = text.replace("```json", "").replace("```", "").strip()
         
         # Extract JSON
-        import re
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if match:
-            result = json.loads(match.group(0))
+        start = text.find("{")
+        if start >= 0:
+            result, _ = _JSON_DECODER.raw_decode(text, start)
+            store_analysis(cache_key, result)
             return result
         else:
             logger.warning(f"No JSON found in Gemini response for {channel_info['title']}")
@@ -208,6 +243,22 @@ RECENT VIDEO TITLES:
         logger.error(f"Gemini analysis failed for {channel_info['title']}: {e}")
         return None
 
+def analyze_channel(channel_info):
+    """Filter and AI-score one channel. Returns (channel_info, analysis) or None."""
+    # Skip channels with very low subscribers
+    if channel_info["subscriber_count"] < 10_000:
+        logger.info(f"⏭️  Skipping '{channel_info['title']}' - too few subscribers")
+        return None
+    
+    # Get recent videos
+    recent_videos = get_recent_videos(channel_info["id"], max_results=5)
+    
+    # Analyze with Gemini
+    analysis = analyze_channel_with_gemini(channel_info, recent_videos)
+    if not analysis:
+        return None
+    return channel_info, analysis
+
 def find_viral_channels(min_score=70, max_channels=20):
     """Find viral channels using AI analysis."""
     logger.info("🔍 Starting AI-powered channel discovery...")
@@ -215,66 +266,62 @@ def find_viral_channels(min_score=70, max_channels=20):
     all_channel_ids = set()
     recommended_channels = []
     
-    # Search across all queries
-    for query in SEARCH_QUERIES:
-        logger.info(f"Searching: '{query}'")
-        results = search_channels_by_query(query, max_results=10)
-        
+    # Search across all queries at once; they are independent HTTP calls
+    logger.info(f"Searching: {', '.join(repr(q) for q in SEARCH_QUERIES)}")
+    with ThreadPoolExecutor(max_workers=len(SEARCH_QUERIES)) as executor:
+        search_results = list(executor.map(lambda q: search_channels_by_query(q, max_results=10), SEARCH_QUERIES))
+
+    for results in search_results:
         for item in results:
             channel_id = item["id"]["channelId"]
             all_channel_ids.add(channel_id)
     
     logger.info(f"Found {len(all_channel_ids)} unique channels to analyze")
     
-    # Analyze each channel
-    for i, channel_id in enumerate(all_channel_ids, 1):
-        logger.info(f"\n[{i}/{len(all_channel_ids)}] Analyzing channel...")
-        
-        # Get channel details
-        channel_info = get_channel_details(channel_id)
-        if not channel_info:
-            continue
-        
-        # Skip channels with very low subscribers
-        if channel_info["subscriber_count"] < 10_000:
-            logger.info(f"⏭️  Skipping '{channel_info['title']}' - too few subscribers")
-            continue
-        
-        # Get recent videos
-        recent_videos = get_recent_videos(channel_id, max_results=5)
-        
-        # Analyze with Gemini
-        analysis = analyze_channel_with_gemini(channel_info, recent_videos)
-        
-        if not analysis:
-            continue
-        
-        score = analysis.get("score", 0)
-        verdict = analysis.get("verdict", "SKIP")
-        recommended = analysis.get("recommended", False)
-        
-        logger.info(f"📊 {channel_info['title']}")
-        logger.info(f"   Score: {score}/100 | Verdict: {verdict}")
-        logger.info(f"   Reasoning: {analysis.get('reasoning', 'N/A')}")
-        
-        # Add to recommendations if meets criteria
-        if recommended and score >= min_score:
-            recommended_channels.append({
-                "title": channel_info["title"],
-                "id": channel_info["id"],
-                "subs": channel_info["subscriber_count"],
-                "url": channel_info["url"],
-                "ai_score": score,
-                "verdict": verdict,
-                "category": analysis.get("content_category", "unknown"),
-                "viral_potential": analysis.get("viral_potential", "")
-            })
-            logger.info(f"   ✅ ADDED to recommendations!")
-        
-        # Stop if we have enough channels
-        if len(recommended_channels) >= max_channels:
-            logger.info(f"\n✅ Reached target of {max_channels} channels!")
-            break
+    # One channels.list call per 50 channels instead of one per channel
+    channel_details = get_channel_details_batch(all_channel_ids)
+    channels = [channel_details[cid] for cid in all_channel_ids if cid in channel_details]
+    
+    # Analyze channels concurrently, consuming results in order so the early stop still applies
+    executor = ThreadPoolExecutor(max_workers=MAX_ANALYSIS_WORKERS)
+    try:
+        results = executor.map(analyze_channel, channels)
+        for i, result in enumerate(results, 1):
+            logger.info(f"\n[{i}/{len(channels)}] Analyzing channel...")
+            if not result:
+                continue
+            channel_info, analysis = result
+            
+            score = analysis.get("score", 0)
+            verdict = analysis.get("verdict", "SKIP")
+            recommended = analysis.get("recommended", False)
+            
+            logger.info(f"📊 {channel_info['title']}")
+            logger.info(f"   Score: {score}/100 | Verdict: {verdict}")
+            logger.info(f"   Reasoning: {analysis.get('reasoning', 'N/A')}")
+            
+            # Add to recommendations if meets criteria
+            if recommended and score >= min_score:
+                recommended_channels.append({
+                    "title": channel_info["title"],
+                    "id": channel_info["id"],
+                    "subs": channel_info["subscriber_count"],
+                    "url": channel_info["url"],
+                    "ai_score": score,
+                    "verdict": verdict,
+                    "category": analysis.get("content_category", "unknown"),
+                    "viral_potential": analysis.get("viral_potential", "")
+                })
+                logger.info(f"   ✅ ADDED to recommendations!")
+            
+            # Stop if we have enough channels
+            if len(recommended_channels) >= max_channels:
+                logger.info(f"\n✅ Reached target of {max_channels} channels!")
+                break
+    finally:
+        # Don't start analyses we no longer need
+        executor.shutdown(wait=True, cancel_futures=True)
+        save_analysis_cache()
     
     # Sort by AI score
     recommended_channels.sort(key=lambda x: x["ai_score"], reverse=True)
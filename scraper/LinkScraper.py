@@ -1,16 +1,20 @@
 # LinkScraper.py
 import os
+import re
 import logging
 from urllib.parse import urlparse, parse_qs
 from dotenv import load_dotenv
 import requests
-import isodate
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-import feedparser
+from xml.etree import ElementTree
 from datetime import datetime, timedelta, timezone
 import time
-from db_scripts.db_insert import db_insert_video
-from db_scripts.db_helpers import fetch_channels, video_exists
+from concurrent.futures import ThreadPoolExecutor
+from db_scripts.db_connect import POOL_MAX_CONN
+from db_scripts.db_insert import db_insert_videos
+from db_scripts.db_helpers import fetch_channels, videos_exist
 
 load_dotenv()
 
@@ -21,10 +25,33 @@ YT_API_SEARCH = "https://www.googleapis.com/youtube/v3/search"
 YT_API_CHANNELS = "https://youtube.googleapis.com/youtube/v3/channels"
 YT_API_VIDEOS = "https://www.googleapis.com/youtube/v3/videos"
 
+# YouTube's Atom feed has a fixed schema, so it is read with ElementTree directly
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_YT = "{http://www.youtube.com/xml/schemas/2015}"
+RSS_ENTRY = f"{_ATOM}entry"
+RSS_PUBLISHED = f"{_ATOM}published"
+RSS_ID = f"{_ATOM}id"
+RSS_VIDEO_ID = f"{_YT}videoId"
+
+# YouTube durations are ISO 8601 like PT1H2M3S (P1DT... for very long streams, P0D for live)
+DURATION_RE = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
 MIN_DURATION_MIN = 10  # only videos longer than 15 minutes
 MAX_DURATION_MIN = 20 # only videos shorter than 120 minutes
 MAX_AGE_DAYS = 7       # only videos published in the last 7 days
 
+# Channels are scraped concurrently (RSS + API calls are pure I/O). Each worker
+# may hold a pooled DB connection, and the pool raises rather than blocks when empty.
+MAX_CHANNEL_WORKERS = min(16, POOL_MAX_CONN)
+
+# One keep-alive session for every HTTP call, so the TLS handshakes are paid once per host
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+
 # ----------------- Helper Functions ----------------- #
 
 def extract_youtube_id_from_url(url):
@@ -58,26 +85,38 @@ def fetch_videos_via_rss(channel_id):
     """Fetch recent videos using RSS feed (0 quota cost) filtered by age."""
     rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
     try:
-        feed = feedparser.parse(rss_url)
+        r = SESSION.get(rss_url, timeout=10)
+        r.raise_for_status()
+        root = ElementTree.fromstring(r.content)
         video_ids = []
         now = time.time()
         max_age_seconds = MAX_AGE_DAYS * 24 * 60 * 60
         
-        for entry in feed.entries:
+        for entry in root.iterfind(RSS_ENTRY):
             # Check publication date
-            if hasattr(entry, 'published_parsed'):
-                pub_time = time.mktime(entry.published_parsed)
+            published = entry.findtext(RSS_PUBLISHED)
+            if published:
+                pub_time = datetime.fromisoformat(published).timestamp()
                 if now - pub_time > max_age_seconds:
                     continue # Skip older videos
             
-            # Entry ID is usually yt:video:VIDEO_ID
-            v_id = entry.yt_videoid if hasattr(entry, 'yt_videoid') else entry.id.split(':')[-1]
-            video_ids.append(v_id)
+            # Fall back to the entry ID, usually yt:video:VIDEO_ID
+            v_id = entry.findtext(RSS_VIDEO_ID) or entry.findtext(RSS_ID, "").split(':')[-1]
+            if v_id:
+                video_ids.append(v_id)
         return video_ids
     except Exception as e:
         logger.warning(f"RSS fetch failed for {channel_id}: {e}")
         return []
 
+def parse_duration(iso_duration):
+    """Return an ISO 8601 duration in whole seconds, or -1 if it is not in YouTube's format."""
+    m = DURATION_RE.match(iso_duration)
+    if not m:
+        return -1
+    d, h, mi, se = (int(x or 0) for x in m.groups())
+    return d * 86400 + h * 3600 + mi * 60 + se
+
 def get_video_details(video_ids, min_duration_min=15, max_duration_min=120):
     """Batch fetch video details and filter by duration (1 unit per 50 videos)."""
     api_key = os.getenv("YT_API_KEY")
@@ -92,20 +131,19 @@ def get_video_details(video_ids, min_duration_min=15, max_duration_min=120):
     }
     
     try:
-        r = requests.get(YT_API_VIDEOS, params=params_v, timeout=10)
+        r = SESSION.get(YT_API_VIDEOS, params=params_v, timeout=10)
         if r.status_code == 403:
             logger.error(f"Forbidden (403) for videos.list: {r.text}")
         r.raise_for_status()
         
         videos_data = r.json().get("items", [])
         
-        def parse_duration(iso_duration):
-            return int(isodate.parse_duration(iso_duration).total_seconds())
-
+        min_s = min_duration_min * 60
+        max_s = max_duration_min * 60
         filtered_videos = [
             f"https://www.youtube.com/watch?v={v['id']}"
             for v in videos_data
-            if min_duration_min * 60 <= parse_duration(v["contentDetails"]["duration"]) <= max_duration_min * 60
+            if min_s <= parse_duration(v["contentDetails"]["duration"]) <= max_s
         ]
         return filtered_videos
     except Exception as e:
@@ -136,7 +174,7 @@ def fetch_videos_with_youtube_api(identifier, id_type="channelId", max_results=5
         params["forUsername"] = identifier
 
     try:
-        r = requests.get(YT_API_SEARCH, params=params, timeout=10)
+        r = SESSION.get(YT_API_SEARCH, params=params, timeout=10)
         if r.status_code == 403:
             logger.error(f"Forbidden (403) for search.list: {r.text}")
         r.raise_for_status()
@@ -159,7 +197,7 @@ def resolve_handle_to_channel_id(handle):
     try:
         handle_name = handle.lstrip("@")
         params = {"part": "id", "forUsername": handle_name, "key": api_key}
-        r = requests.get(YT_API_CHANNELS, params=params, timeout=10)
+        r = SESSION.get(YT_API_CHANNELS, params=params, timeout=10)
         r.raise_for_status()
         items = r.json().get("items", [])
         return items[0]["id"] if items else None
@@ -168,60 +206,75 @@ def resolve_handle_to_channel_id(handle):
         return None
 
 
-def get_videos_for_channel_link(link):
-    """Return video links for a given channel link."""
+def collect_channel_videos(link):
+    """
+    Discover a channel's recent videos. Returns (rss_video_ids, video_links): RSS IDs still
+    need the duration filter (done in shared batches by main), links are already final.
+    """
     mode, identifier = extract_youtube_id_from_url(link)
     if not identifier:
         logger.warning(f"Could not determine ID from link: {link}")
-        return []
+        return [], []
 
     try:
+        if mode == "handle":
+            channel_id = resolve_handle_to_channel_id(identifier)
+            if not channel_id:
+                return [], []
+            mode, identifier = "channel", channel_id
+
         if mode == "channel":
             # TRY RSS FIRST (0 quota)
             v_ids = fetch_videos_via_rss(identifier)
             if v_ids:
-                return get_video_details(v_ids, max_duration_min=MAX_DURATION_MIN)
+                return v_ids, []
             # Fallback to API if RSS fails
-            return fetch_videos_with_youtube_api(identifier, id_type="channelId", max_duration_min=MAX_DURATION_MIN)
+            return [], fetch_videos_with_youtube_api(identifier, id_type="channelId", max_duration_min=MAX_DURATION_MIN)
         
         if mode == "user":
-            return fetch_videos_with_youtube_api(identifier, id_type="forUsername", max_duration_min=MAX_DURATION_MIN)
+            return [], fetch_videos_with_youtube_api(identifier, id_type="forUsername", max_duration_min=MAX_DURATION_MIN)
         
         if mode == "video":
-            return [f"https://www.youtube.com/watch?v={identifier}"]
-        
-        if mode == "handle":
-            channel_id = resolve_handle_to_channel_id(identifier)
-            if channel_id:
-                # TRY RSS FIRST (0 quota)
-                v_ids = fetch_videos_via_rss(channel_id)
-                if v_ids:
-                    return get_video_details(v_ids, max_duration_min=MAX_DURATION_MIN)
-                return fetch_videos_with_youtube_api(channel_id, id_type="channelId", max_duration_min=MAX_DURATION_MIN)
+            return [], [f"https://www.youtube.com/watch?v={identifier}"]
     except Exception as e:
         logger.warning(f"Error for {mode} '{identifier}': {e}")
-    return []
+    return [], []
+
+
+def get_video_details_batched(video_ids):
+    """Duration-filter any number of video IDs, 50 per videos.list call."""
+    links = []
+    for start in range(0, len(video_ids), 50):
+        links.extend(get_video_details(video_ids[start:start + 50], max_duration_min=MAX_DURATION_MIN))
+    return links
+
+
+def get_videos_for_channel_link(link):
+    """Return video links for a given channel link."""
+    v_ids, video_links = collect_channel_videos(link)
+    return get_video_details(v_ids, max_duration_min=MAX_DURATION_MIN) if v_ids else video_links
 
 
 # ----------------- Main Logic ----------------- #
 
-def process_channel(channel_id, channel_name, channel_link, max_videos=None):
+def process_channel(channel_id, channel_name, channel_link, max_videos=None, video_links=None):
     logger.info(f"Processing channel '{channel_name}' (ID: {channel_id})")
-    video_links = get_videos_for_channel_link(channel_link)
+    if video_links is None:
+        video_links = get_videos_for_channel_link(channel_link)
     if not video_links:
         logger.info(f"No videos found for {channel_name}")
         return
 
-    added_count = 0
-    for vlink in video_links:
-        if max_videos is not None and added_count >= max_videos:
-            logger.info(f"Reached limit of {max_videos} videos for {channel_name}")
-            break
-            
-        if not video_exists(vlink):
-            logger.info(f"Adding new video: {vlink}")
-            db_insert_video(vlink, channel_id)
-            added_count += 1
+    # One existence query per channel instead of one per video
+    existing = videos_exist(video_links)
+    new_links = [vlink for vlink in video_links if vlink not in existing]
+    if max_videos is not None and len(new_links) > max_videos:
+        logger.info(f"Reached limit of {max_videos} videos for {channel_name}")
+        new_links = new_links[:max_videos]
+
+    for vlink in new_links:
+        logger.info(f"Adding new video: {vlink}")
+    db_insert_videos([(vlink, channel_id) for vlink in new_links])
 
 
 def main(max_videos_per_channel=None):
@@ -230,12 +283,37 @@ def main(max_videos_per_channel=None):
         logger.info("No channels found. Please add channels and re-run.")
         return
 
-    for ch_id, name, link in channels:
+    def collect_one(channel):
         try:
-            process_channel(ch_id, name, link, max_videos=max_videos_per_channel)
+            return collect_channel_videos(channel[2])
+        except Exception as e:
+            logger.exception(f"Error collecting videos for channel {channel[1]}: {e}")
+            return [], []
+
+    def process_one(job):
+        (ch_id, name, link), video_links = job
+        try:
+            process_channel(ch_id, name, link, max_videos=max_videos_per_channel, video_links=video_links)
         except Exception as e:
             logger.exception(f"Error processing channel {name}: {e}")
 
+    with ThreadPoolExecutor(max_workers=MAX_CHANNEL_WORKERS) as executor:
+        # Phase 1: RSS/API discovery for every channel
+        found = list(executor.map(collect_one, channels))
+
+        # Phase 2: duration-filter all RSS IDs together, so channels share each 50-ID videos.list call
+        rss_ids = [v_id for v_ids, _ in found for v_id in v_ids]
+        kept = set(get_video_details_batched(rss_ids))
+
+        # Phase 3: hand each channel its surviving videos, in feed order
+        jobs = []
+        for channel, (v_ids, video_links) in zip(channels, found):
+            if v_ids:
+                rss_links = (f"https://www.youtube.com/watch?v={v_id}" for v_id in v_ids)
+                video_links = [vlink for vlink in rss_links if vlink in kept]
+            jobs.append((channel, video_links))
+        list(executor.map(process_one, jobs))
+
 
 if __name__ == "__main__":
     # If run standalone, we might want to pass a limit from env or just no limit
@@ -2,10 +2,18 @@ import os
 import json
 import subprocess
 from pathlib import Path
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from faster_whisper import WhisperModel
 import logging
 import time
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional: it only speeds up writing large transcripts
+    orjson = None
+
 # Constants
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 IS_DOCKER = os.path.exists("/.dockerenv")
@@ -30,15 +38,38 @@ logging.basicConfig(
 # Load Faster-Whisper model
 # Efficiency: Faster-Whisper is much faster than standard Whisper
 # Accuracy: Using word-level timestamps instead of linear interpolation
-MODEL_SIZE = "small" # options: "tiny", "base", "small", "medium", "large-v3"
-logger.info(f"Loading Faster-Whisper model: {MODEL_SIZE}")
+MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "small") # options: "tiny", "base", "small", "medium", "large-v3"
+COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE") # default: "int8_float16" on CUDA, "int8" on CPU
+BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "1")) # greedy; WER within ~1% of beam 5 on English speech
 
-# Use "float32" for CPU if "int8" is not supported, or "int8" for best efficiency on CPU
-model = WhisperModel(MODEL_SIZE, device="cpu", compute_type="int8")
+def _cuda_available():
+    """CTranslate2 ships with faster-whisper and does the actual CUDA work, so ask it directly."""
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        return False
+
+def load_model():
+    """Load Whisper on the GPU when there is one, otherwise on all CPU cores."""
+    if _cuda_available():
+        compute_type = COMPUTE_TYPE or "int8_float16"
+        logger.info(f"Loading Faster-Whisper model: {MODEL_SIZE} (cuda, {compute_type})")
+        try:
+            return WhisperModel(MODEL_SIZE, device="cuda", compute_type=compute_type)
+        except Exception as e:
+            logger.warning(f"CUDA model load failed, falling back to CPU: {e}")
+
+    # Use "float32" for CPU if "int8" is not supported, or "int8" for best efficiency on CPU
+    compute_type = COMPUTE_TYPE or "int8"
+    logger.info(f"Loading Faster-Whisper model: {MODEL_SIZE} (cpu, {compute_type})")
+    return WhisperModel(MODEL_SIZE, device="cpu", compute_type=compute_type,
+                        cpu_threads=os.cpu_count() or 0, num_workers=2)
+
+model = load_model()
 
 def extract_audio(video_path):
-    """Extract normalized audio from video as WAV."""
-    audio_path = video_path.with_suffix(".wav")
+    """Extract normalized 16 kHz mono audio from video as a float32 array (piped, no WAV on disk)."""
     logger.info(f"Extracting audio from {video_path.name}...")
     
     cmd = [
@@ -49,17 +80,16 @@ def extract_audio(video_path):
         "-vn",
         "-ac", "1",
         "-ar", "16000",
-        "-c:a", "pcm_s16le",
         "-af", "volume=1.5",
-        "-y",
-        str(audio_path)
+        "-f", "s16le",
+        "-"
     ]
 
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if not audio_path.exists() or audio_path.stat().st_size == 0:
-            raise RuntimeError("FFmpeg output file is empty")
-        return audio_path
+        proc = subprocess.run(cmd, check=True, capture_output=True)
+        if not proc.stdout:
+            raise RuntimeError("FFmpeg produced no audio")
+        return np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
     except subprocess.CalledProcessError as e:
         logger.error(f"FFmpeg failed: {e.stderr.decode()}")
         return None
@@ -67,84 +97,111 @@ def extract_audio(video_path):
         logger.error(f"Audio extraction error: {e}")
         return None
 
-def transcribe_audio(audio_path):
-    """Transcribe audio using Faster-Whisper with word-level timestamps."""
-    if not audio_path:
+def to_json_bytes(data):
+    """Compact UTF-8 JSON, via orjson when available."""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def transcribe_audio(audio, full_path):
+    """
+    Transcribe audio using Faster-Whisper with word-level timestamps.
+    Segments are written to `full_path` as the decoder yields them, so the full transcript
+    is never held in memory. Returns the simplified transcript, or None on failure.
+    """
+    if audio is None:
         return None
 
+    tmp_path = full_path.with_name(full_path.name + ".tmp")
     try:
         start_time = time.time()
         # Efficiency: word_timestamps=True provides exact word timing
+        # Efficiency: VAD skips silent stretches; not conditioning on previous text also curbs hallucinated repeats
         segments, info = model.transcribe(
-            str(audio_path),
-            beam_size=5,
+            audio,
+            beam_size=BEAM_SIZE,
+            best_of=1,
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=500),
             word_timestamps=True,
+            condition_on_previous_text=False,
             language="en" # Force English if known, or set to None for auto
         )
         
         logger.info(f"Transcription language: {info.language} ({info.language_probability:.2f})")
-        
-        results = {
-            "text": "",
-            "segments": [],
-            "words": []
-        }
-
-        for segment in segments:
-            seg_data = {
-                "start": round(segment.start, 3),
-                "end": round(segment.end, 3),
-                "text": segment.text.strip()
-            }
-            results["segments"].append(seg_data)
-            results["text"] += segment.text + " "
-            
-            if segment.words:
-                for word in segment.words:
-                    results["words"].append({
-                        "start": round(word.start, 3),
-                        "end": round(word.end, 3),
-                        "word": word.word.strip(),
-                        "probability": word.probability
-                    })
+
+        text = []
+        with open(tmp_path, "wb") as f:
+            def stream_words():
+                f.write(b'{"segments":[')
+                for n, segment in enumerate(segments):
+                    # Words live inside their segment; there is no separate top-level word list
+                    seg_data = {
+                        "start": round(segment.start, 3),
+                        "end": round(segment.end, 3),
+                        "text": segment.text.strip(),
+                        "words": [{
+                            "start": round(word.start, 3),
+                            "end": round(word.end, 3),
+                            "word": word.word.strip(),
+                            "probability": word.probability
+                        } for word in segment.words or ()]
+                    }
+                    f.write(b"," + to_json_bytes(seg_data) if n else to_json_bytes(seg_data))
+                    text.append(segment.text + " ")
+                    yield from seg_data["words"]
+
+            simplified = get_simplified_transcript(stream_words())
+            f.write(b'],"text":' + to_json_bytes("".join(text)) + b"}")
+        # Only a complete transcript replaces the target file
+        os.replace(tmp_path, full_path)
+        logger.info(f"Saved: {full_path.name}")
 
         duration = time.time() - start_time
         logger.info(f"Transcription finished in {duration:.2f}s")
-        return results
+        return simplified
     except Exception as e:
         logger.error(f"Transcription failed: {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
         return None
 
-def get_simplified_transcript(whisper_result, max_words=2):
+def get_simplified_transcript(words, max_words=2):
     """
     Generate simplified transcript using EXACT word timestamps.
-    Chunks words into groups of `max_words`.
+    Chunks words (any iterable, e.g. streamed from the decoder) into groups of `max_words`.
     """
-    if not whisper_result or not whisper_result.get("words"):
+    # Efficiency: gather columns once, then average every chunk's probabilities in one numpy reduction
+    starts, ends, texts, probs = [], [], [], []
+    for w in words:
+        starts.append(w["start"])
+        ends.append(w["end"])
+        texts.append(w["word"])
+        probs.append(w["probability"])
+
+    n = len(texts)
+    if not n:
         return []
 
-    words = whisper_result["words"]
-    simplified = []
-    
-    for i in range(0, len(words), max_words):
-        chunk = words[i:i + max_words]
-        if not chunk:
-            continue
-            
-        simplified.append({
-            "start": chunk[0]["start"],
-            "end": chunk[-1]["end"],
-            "text": " ".join([w["word"] for w in chunk]),
-            "confidence": round(sum([w["probability"] for w in chunk]) / len(chunk), 3)
-        })
+    idx = np.arange(0, n, max_words)
+    confs = np.add.reduceat(np.asarray(probs, dtype=np.float64), idx) / np.diff(np.append(idx, n))
+    last = np.minimum(idx + max_words - 1, n - 1).tolist()
 
-    return simplified
+    return [{
+        "start": starts[i],
+        "end": ends[j],
+        "text": " ".join(texts[i:i + max_words]),
+        "confidence": round(conf, 3)
+    } for i, j, conf in zip(idx.tolist(), last, confs.tolist())]
 
 def save_json(data, output_path):
     """Safely save data to JSON."""
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if orjson:
+            output_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         logger.info(f"Saved: {output_path.name}")
     except Exception as e:
         logger.error(f"Failed to save {output_path}: {e}")
@@ -157,32 +214,36 @@ def main():
         logger.info("No videos found to process.")
         return
 
+    # Check if already transcribed to avoid redundant work
+    pending = []
     for video_path in videos:
-        # Check if already transcribed to avoid redundant work
         simple_path = Path(SIMPLE_TRANSCRIPT_DIR) / f"{video_path.stem}_simple.json"
         if simple_path.exists():
             logger.info(f"Skipping {video_path.name} (already transcribed)")
             continue
+        pending.append((video_path, simple_path))
 
-        audio_path = extract_audio(video_path)
-        if not audio_path:
-            continue
+    if not pending:
+        return
 
-        logger.info(f"Transcribing {video_path.name}...")
-        result = transcribe_audio(audio_path)
-        
-        if result:
-            # Save full transcript
+    # Efficiency: ffmpeg extracts the next video's audio while Whisper transcribes the current one
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        next_audio = prefetch.submit(extract_audio, pending[0][0])
+        for i, (video_path, simple_path) in enumerate(pending):
+            audio = next_audio.result()
+            if i + 1 < len(pending):
+                next_audio = prefetch.submit(extract_audio, pending[i + 1][0])
+            if audio is None:
+                continue
+
+            logger.info(f"Transcribing {video_path.name}...")
+            # Full transcript is streamed to disk (compact: it is the largest artifact and only read by code)
             full_path = Path(TRANSCRIPT_DIR) / f"{video_path.stem}.json"
-            save_json(result, full_path)
-
-            # Save simplified (word-exact) transcript
-            simplified = get_simplified_transcript(result)
-            save_json(simplified, simple_path)
+            simplified = transcribe_audio(audio, full_path)
 
-        # Cleanup audio
-        if audio_path.exists():
-            audio_path.unlink()
+            if simplified is not None:
+                # Save simplified (word-exact) transcript
+                save_json(simplified, simple_path)
 
     logger.info("Transcriber Process Complete")
 
@@ -2,25 +2,43 @@ import os
 import re
 import json
 import time
+import heapq
+import queue
+import shutil
 import pickle
 import logging
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from googleapiclient.errors import HttpError
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+# Google client libraries are imported where they are used: a run with nothing to upload never loads them
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional: it only speeds up parsing the highlights file
+    orjson = None
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    # Linux-only optional dependency; watch mode falls back to polling every CHECK_INTERVAL
+    INotify = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+CLIP_INDEX_RE = re.compile(r"clip_(\d+)")
+
 # Constants
 SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
 
 # Use absolute paths based on BASE_DIR
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CLIENT_SECRETS_FILE = os.path.join(BASE_DIR, 'client_secrets.json')
-TOKEN_FILE = os.path.join(BASE_DIR, 'token.pickle')
+TOKEN_FILE = os.path.join(BASE_DIR, 'token.json')
+# Older installs stored the credentials pickled; read once and migrated to TOKEN_FILE
+LEGACY_TOKEN_FILE = os.path.join(BASE_DIR, 'token.pickle')
 
 # Default to ../edited_clips relative to this script, or use env var
 DEFAULT_CLIPS_DIR = os.path.abspath(os.path.join(BASE_DIR, '..', 'edited_clips'))
@@ -29,12 +47,71 @@ HIGHLIGHTS_DIR = os.getenv('HIGHLIGHTS_DIR', os.path.abspath(os.path.join(BASE_D
 
 UPLOADED_CLIPS_DIR = os.path.join(EDITED_CLIPS_DIR, 'uploaded')
 CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', '60')) # seconds
+# Run as a long-lived service that uploads clips as they appear, instead of one pass
+WATCH = os.getenv('UPLOADER_WATCH', '0') == '1'
+
+# Resumable upload chunk size; YouTube requires a multiple of 256 KiB
+UPLOAD_CHUNK_ALIGN = 256 * 1024
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(64 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = max(UPLOAD_CHUNK_ALIGN, UPLOAD_CHUNK_SIZE - UPLOAD_CHUNK_SIZE % UPLOAD_CHUNK_ALIGN)
+# Retries per chunk on 5xx/429 and dropped connections; googleapiclient backs off exponentially,
+# so a transient failure re-sends one chunk instead of aborting the upload
+UPLOAD_RETRIES = int(os.getenv('UPLOAD_RETRIES', '5'))
+# Clips uploaded per run, concurrently. Default 1 keeps the one-Short-per-run publishing cadence
+MAX_PARALLEL_UPLOADS = max(1, int(os.getenv('MAX_PARALLEL_UPLOADS', '1')))
+
+# Credentials reused across get_credentials() calls; only reloaded/refreshed once they are no longer valid
+_credentials = None
+_credentials_lock = threading.Lock()
+
+# Parsed YouTube discovery document, shared by every client this process builds
+_discovery_doc = None
+# Idle (creds, client) pairs. Each client owns an httplib2 connection that stays open for the next
+# upload in this process, which only comes in watch() mode or when one pass uploads several clips.
+# httplib2 is not thread-safe, so a client serves one upload at a time and is then handed back
+_idle_clients = queue.SimpleQueue()
+
+# Parsed highlights keyed by (path, mtime_ns). A single upload reads its file once, so this only pays off
+# in watch() mode or when MAX_PARALLEL_UPLOADS clips from the same video are looked up in one pass
+_HIGHLIGHTS_CACHE = {}
+
+def save_credentials(creds):
+    """Persist OAuth credentials as JSON (the google-auth supported format)."""
+    with open(TOKEN_FILE, 'w') as f:
+        f.write(creds.to_json())
+
+def load_credentials():
+    """Load saved credentials, migrating a legacy pickle token on first use."""
+    from google.oauth2.credentials import Credentials
 
-def get_authenticated_service():
-    creds = None
     if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, 'rb') as token:
+        with open(TOKEN_FILE, 'r') as f:
+            return Credentials.from_authorized_user_info(json.load(f), SCOPES)
+
+    if os.path.exists(LEGACY_TOKEN_FILE):
+        with open(LEGACY_TOKEN_FILE, 'rb') as token:
             creds = pickle.load(token)
+        save_credentials(creds)
+        logger.info(f"Migrated {LEGACY_TOKEN_FILE} to {TOKEN_FILE}")
+        return creds
+
+    return None
+
+def get_credentials():
+    """Return valid OAuth credentials, refreshing or running the browser flow as needed."""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is not None and _credentials.valid:
+            return _credentials
+        _credentials = _load_valid_credentials(_credentials)
+        return _credentials
+
+def _load_valid_credentials(creds):
+    """Refresh the given (or saved) credentials, or run the OAuth flow, and persist the result."""
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
+    creds = creds or load_credentials()
     
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
@@ -46,35 +123,96 @@ def get_authenticated_service():
             flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRETS_FILE, SCOPES)
             creds = flow.run_local_server(port=0)
         
-        with open(TOKEN_FILE, 'wb') as token:
-            pickle.dump(creds, token)
-            
-    return build('youtube', 'v3', credentials=creds)
+        save_credentials(creds)
+
+    return creds
+
+def build_youtube(creds):
+    """Build a YouTube client, parsing the discovery document only once per process."""
+    from googleapiclient.discovery import build, build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+
+    global _discovery_doc
+    if _discovery_doc is None:
+        # googleapiclient bundles the document, so no network fetch is needed
+        doc = get_static_doc('youtube', 'v3')
+        if doc is None:
+            # Never fetch the document over the network; fail clearly instead
+            return build('youtube', 'v3', credentials=creds, static_discovery=True, cache_discovery=False)
+        _discovery_doc = json.loads(doc)
+    return build_from_document(_discovery_doc, credentials=creds)
+
+@contextmanager
+def youtube_client(creds):
+    """Borrow a YouTube client for one upload, reusing an idle one (and its open TLS connection) if possible."""
+    try:
+        owner, youtube = _idle_clients.get_nowait()
+        # Identity is enough: get_credentials() refreshes the cached object in place, and the client reads
+        # the token per request. A new object only follows a re-login, whose old client must go anyway
+        if owner is not creds:
+            youtube = build_youtube(creds)
+    except queue.Empty:
+        youtube = build_youtube(creds)
+    # A client whose upload raised is dropped rather than reused
+    yield youtube
+    _idle_clients.put((creds, youtube))
+
+def load_json(path):
+    """Load a JSON file, with orjson when it is installed."""
+    if orjson:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def load_highlights(h_file_path):
+    """Return the parsed highlights file, re-reading it only when it has changed on disk."""
+    key = (h_file_path, os.stat(h_file_path).st_mtime_ns)
+    highlights = _HIGHLIGHTS_CACHE.get(key)
+    if highlights is None:
+        highlights = load_json(h_file_path)
+        # Drop stale versions of this file
+        for old_key in [k for k in _HIGHLIGHTS_CACHE if k[0] == h_file_path]:
+            del _HIGHLIGHTS_CACHE[old_key]
+        _HIGHLIGHTS_CACHE[key] = highlights
+    return highlights
+
+def metadata_path(file_name):
+    """Sidecar the editor writes next to each clip: clip_01_viral.mp4 -> clip_01_viral.meta.json"""
+    return os.path.join(EDITED_CLIPS_DIR, os.path.splitext(file_name)[0] + '.meta.json')
+
+def find_highlight(file_name):
+    """Fallback for clips without a sidecar: look the clip's index up in the highlights JSON."""
+    match = CLIP_INDEX_RE.search(file_name)
+    if not match:
+        return None
+    
+    idx = int(match.group(1)) - 1
+    
+    # Find the highlights file (assuming one for now as per system design)
+    with os.scandir(HIGHLIGHTS_DIR) as it:
+        h_file = next((e for e in it if e.name.endswith('_highlights.json')), None)
+    if h_file is None:
+        return None
+        
+    # For now, we take the most recent highlights file or the first one
+    highlights = load_highlights(h_file.path)
+    if 0 <= idx < len(highlights):
+        return highlights[idx]
+    return None
 
 def get_video_metadata(file_name):
     """
-    Attempt to find metadata in highlights JSON.
+    Find a clip's title and hashtags, from the editor's sidecar or else the highlights JSON.
     Expected clip name format: clip_01_viral.mp4
     """
     try:
-        match = re.search(r"clip_(\d+)", file_name)
-        if not match:
-            return None, None
-        
-        idx = int(match.group(1)) - 1
-        
-        # Find the highlights file (assuming one for now as per system design)
-        h_files = [f for f in os.listdir(HIGHLIGHTS_DIR) if f.endswith('_highlights.json')]
-        if not h_files:
-            return None, None
-            
-        # For now, we take the most recent highlights file or the first one
-        h_file_path = os.path.join(HIGHLIGHTS_DIR, h_files[0])
-        with open(h_file_path, 'r') as f:
-            highlights = json.load(f)
-            
-        if 0 <= idx < len(highlights):
-            h = highlights[idx]
+        try:
+            h = load_json(metadata_path(file_name))
+        except FileNotFoundError:
+            h = find_highlight(file_name)
+
+        if h is not None:
             title = h.get('title', file_name)
             hashtags = h.get('hashtags', ['#shorts', '#automation'])
             return title, hashtags
@@ -84,6 +222,8 @@ def get_video_metadata(file_name):
     return None, None
 
 def upload_video(youtube, file_path):
+    from googleapiclient.http import MediaIoBaseUpload
+
     file_name = os.path.basename(file_path)
     title, hashtags = get_video_metadata(file_name)
     
@@ -93,16 +233,18 @@ def upload_video(youtube, file_path):
     # YouTube titles are max 100 chars
     final_title = title[:80] + " #shorts"
     
-    description = f"{title}\n\n"
-    if hashtags:
-        description += " ".join(hashtags)
-    description += "\n\nStay tuned for more videos!"
+    hashtag_line = " ".join(hashtags) if hashtags else ""
+    description = f"{title}\n\n{hashtag_line}\n\nStay tuned for more videos!"
+
+    # Hashtags only carry '#' on the left
+    tags = [t.lstrip('#') for t in (hashtags or ())]
+    tags.append('shorts')
     
     body = {
         'snippet': {
             'title': final_title,
             'description': description,
-            'tags': [t.strip('#') for t in (hashtags or [])] + ['shorts'],
+            'tags': tags,
             'categoryId': '22' # People & Blogs
         },
         'status': {
@@ -111,63 +253,138 @@ def upload_video(youtube, file_path):
         }
     }
     
-    insert_request = youtube.videos().insert(
-        part=','.join(body.keys()),
-        body=body,
-        media_body=MediaFileUpload(file_path, chunksize=-1, resumable=True)
-    )
-    
     logger.info(f"Uploading: {file_path}")
     logger.info(f"Title: {final_title}")
-    
-    response = None
-    while response is None:
-        status, response = insert_request.next_chunk()
-        if status:
-            logger.info(f"Uploaded {int(status.progress() * 100)}%")
+
+    # Own the file handle so it is closed as soon as the upload ends (MediaFileUpload only closes it on GC).
+    # A chunk-sized read() already bypasses the 8 KiB buffer in one syscall, so a bigger buffer would not help.
+    with open(file_path, 'rb') as fh:
+        # Not batchable: BatchHttpRequest rejects media requests. The session POST still rides the borrowed
+        # client's connection, which is already open when the client is reused (see youtube_client)
+        insert_request = youtube.videos().insert(
+            part=','.join(body.keys()),
+            body=body,
+            media_body=MediaIoBaseUpload(fh, mimetype='video/mp4', chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+        )
+
+        response = None
+        while response is None:
+            status, response = insert_request.next_chunk(num_retries=UPLOAD_RETRIES)
+            if status:
+                logger.info(f"Uploaded {int(status.progress() * 100)}%")
             
     logger.info(f"Upload complete! Video ID: {response['id']}")
     return response
 
+def move_file(src, dest):
+    """Move src to dest, copying across filesystems (e.g. separate container mounts) when needed."""
+    try:
+        os.replace(src, dest)
+    except OSError:
+        shutil.move(src, dest)
+
+def upload_one(creds, file_to_upload):
+    """Upload one clip and move it to the uploaded folder. Returns True on success."""
+    from googleapiclient.errors import HttpError
+
+    file_path = os.path.join(EDITED_CLIPS_DIR, file_to_upload)
+    try:
+        # googleapiclient clients are not thread-safe, so each concurrent upload borrows its own
+        with youtube_client(creds) as youtube:
+            upload_video(youtube, file_path)
+
+        # Move to uploaded folder. Clips must leave EDITED_CLIPS_DIR rather than be marked uploaded in place:
+        # names like clip_01_viral.mp4 repeat for every source video, and the editor skips outputs that exist
+        dest_path = os.path.join(UPLOADED_CLIPS_DIR, file_to_upload)
+        move_file(file_path, dest_path)
+        meta_path = metadata_path(file_to_upload)
+        if os.path.exists(meta_path):
+            move_file(meta_path, os.path.join(UPLOADED_CLIPS_DIR, os.path.basename(meta_path)))
+        logger.info(f"Moved {file_to_upload} to {UPLOADED_CLIPS_DIR}")
+        return True
+
+    except HttpError as e:
+        logger.error(f"An HTTP error occurred: {e.resp.status} {e.content}")
+    except Exception as e:
+        logger.error(f"An error occurred during upload of {file_to_upload}: {e}")
+    return False
+
+def upload_pending():
+    """
+    Upload up to MAX_PARALLEL_UPLOADS waiting clips.
+    Returns (uploaded, clips still waiting), or None if authentication failed.
+    """
+    with os.scandir(EDITED_CLIPS_DIR) as it:
+        files = [e.name for e in it if e.name.endswith('.mp4') and e.is_file()]
+    if not files:
+        logger.info("No new videos found in edited_clips.")
+        return 0, 0
+
+    # Only authenticate (and load the Google libraries) once there is something to upload
+    creds = get_credentials()
+    if not creds:
+        logger.error("Failed to authenticate with YouTube. Exiting.")
+        return None
+
+    # Pick the first files in name order without sorting them all
+    batch = heapq.nsmallest(MAX_PARALLEL_UPLOADS, files)
+
+    # Uploads are network-bound, so threads overlap them well
+    with ThreadPoolExecutor(max_workers=len(batch)) as executor:
+        uploaded = sum(executor.map(lambda f: upload_one(creds, f), batch))
+    logger.info(f"Upload task finished ({uploaded}/{len(batch)} uploaded).")
+    return uploaded, len(files) - uploaded
+
 def main():
     if not os.path.exists(UPLOADED_CLIPS_DIR):
         os.makedirs(UPLOADED_CLIPS_DIR, exist_ok=True)
-        
-    youtube = get_authenticated_service()
-    if not youtube:
-        logger.error("Failed to authenticate with YouTube. Exiting.")
-        return
 
-    logger.info("Uploader service started. Checking for one video to upload...")
+    logger.info(f"Uploader service started. Checking for up to {MAX_PARALLEL_UPLOADS} video(s) to upload...")
     
     try:
-        files = [f for f in os.listdir(EDITED_CLIPS_DIR) if f.endswith('.mp4')]
-        if files:
-            # Sort files to ensure we pick them in order
-            files.sort()
-            file_to_upload = files[0]
-            file_path = os.path.join(EDITED_CLIPS_DIR, file_to_upload)
-            
-            try:
-                upload_video(youtube, file_path)
-                
-                # Move to uploaded folder
-                dest_path = os.path.join(UPLOADED_CLIPS_DIR, file_to_upload)
-                os.rename(file_path, dest_path)
-                logger.info(f"Moved {file_to_upload} to {UPLOADED_CLIPS_DIR}")
-                logger.info("Upload task finished. Exiting.")
-                return # Exit after one video
-                
-            except HttpError as e:
-                logger.error(f"An HTTP error occurred: {e.resp.status} {e.content}")
-            except Exception as e:
-                logger.error(f"An error occurred during upload: {e}")
-        
-        else:
-            logger.info("No new videos found in edited_clips.")
-            
+        upload_pending()
     except Exception as e:
         logger.error(f"Error in main: {e}")
 
+def watch():
+    """
+    Service mode: upload clips as they land in EDITED_CLIPS_DIR.
+    Sleeps on inotify when available, so an idle service makes no directory scans.
+    """
+    os.makedirs(UPLOADED_CLIPS_DIR, exist_ok=True)
+
+    inotify = None
+    if INotify is not None:
+        inotify = INotify()
+        # Events only wake the loop, which then scans the directory: the editor muxes under a .part name
+        # and renames the finished clip in (MOVED_TO), so the scan never sees a half-written .mp4
+        inotify.add_watch(EDITED_CLIPS_DIR, flags.CLOSE_WRITE | flags.MOVED_TO)
+        logger.info(f"Watching {EDITED_CLIPS_DIR} for new clips...")
+    else:
+        logger.info(f"inotify_simple not available; polling {EDITED_CLIPS_DIR} every {CHECK_INTERVAL}s...")
+
+    while True:
+        try:
+            result = upload_pending()
+        except Exception as e:
+            logger.error(f"Error in watch loop: {e}")
+            result = (0, 0)
+        if result is None:
+            return
+        uploaded, waiting = result
+
+        # More clips were already queued: no event will announce them
+        if uploaded and waiting:
+            continue
+
+        if inotify:
+            # Still wake after CHECK_INTERVAL so failed uploads get retried
+            inotify.read(timeout=CHECK_INTERVAL * 1000)
+        else:
+            time.sleep(CHECK_INTERVAL)
+
 if __name__ == '__main__':
-    main()
+    if WATCH:
+        watch()
+    else:
+        main()